@@ -0,0 +1,145 @@
+import socket
+
+import aiohttp
+import pytest
+
+from voyager.classes import ProgramBundle
+from voyager.env import VoyagerEnv
+from voyager.env.mock_server import MockMineflayerProcess
+
+STEP_EVENTS = [["onChat", "Mined 1 oak_log"]]
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(params=[True, False], ids=["pause_in_step", "pause_requests"])
+def env(request, tmp_path):
+    server_port = get_free_port()
+    env = VoyagerEnv(
+        mc_port=25565,
+        azure_login=None,
+        server_port=server_port,
+        pause_in_step=request.param,
+        log_path=str(tmp_path),
+    )
+    # the Node process needs a Minecraft server, the mock server does not
+    env.env.mineflayer = MockMineflayerProcess(server_port, step_events=STEP_EVENTS)
+    env.reset(mode="hard")
+    yield env
+    env.close()
+
+
+@pytest.fixture
+def bundle() -> ProgramBundle:
+    return ProgramBundle(
+        skills={
+            "mineWoodLog": "async function mineWoodLog(bot) {\n  await mineBlock(bot, 'oak_log', 1);\n}",
+            "craftTable": "async function craftTable(bot) {\n  await craftItem(bot, 'crafting_table', 1);\n}",
+        },
+        control_primitives=[
+            "async function mineBlock(bot, name, count) {}",
+            "async function craftItem(bot, name, count) {}",
+        ],
+    )
+
+
+def endpoints(env) -> list[str]:
+    return [endpoint for endpoint, _ in env.mineflayer.requests]
+
+
+def bench_soft_reset(benchmark, env):
+    events = benchmark(env.reset, mode="soft")
+    assert events[-1][0] == "observe"
+    # the bot is reused, not respawned
+    assert endpoints(env).count("start") == 1
+    assert env.server_paused
+
+
+def bench_soft_reset_inventory(env):
+    inventory = {"oak_log": 4, "stone_pickaxe": 1}
+    events = env.reset(
+        mode="soft", inventory=inventory, position={"x": 0, "y": -60, "z": 0}
+    )
+    assert events[-1][1]["inventory"] == inventory
+    assert events[-1][1]["status"]["position"] == {"x": 0, "y": -60, "z": 0}
+    assert endpoints(env).count("start") == 1
+    assert endpoints(env).count("reset") == 1
+    # a soft reset without an inventory keeps the current one
+    events = env.reset(mode="soft")
+    assert events[-1][1]["inventory"] == inventory
+    assert env.step("")[-1][1]["inventory"] == inventory
+
+
+def bench_hard_reset(benchmark, env):
+    starts = endpoints(env).count("start")
+    events = benchmark.pedantic(env.reset, kwargs={"mode": "hard"}, rounds=3)
+    assert events[-1][0] == "observe"
+    # every round respawns the process and the bot
+    assert endpoints(env).count("start") > starts
+
+
+def bench_step(benchmark, env, bundle):
+    code = "await mineWoodLog(bot);"
+
+    def step():
+        programs_id = env.register_bundle(bundle.units, bundle.hash)
+        return env.step(
+            code, programs_id=programs_id, dependencies=bundle.dependencies(code)
+        )
+
+    events = benchmark(step)
+    assert events == STEP_EVENTS + [events[-1]]
+    assert events[-1][0] == "observe"
+    # registered once, then only stepped
+    assert endpoints(env).count("programs") == 1
+    steps = [body for endpoint, body in env.mineflayer.requests if endpoint == "step"]
+    assert steps[-1]["dependencies"] == ["mineWoodLog", "0"]
+    assert "programs" not in steps[-1]
+    assert env.server_paused
+
+
+def bench_step_stream(benchmark, env, bundle):
+    programs_id = env.register_bundle(bundle.units, bundle.hash)
+    events = benchmark(lambda: list(env.step_stream("", programs_id=programs_id)))
+    assert [event[0] for event in events] == ["onChat", "observe"]
+
+
+def bench_step_unregistered_programs(env, bundle):
+    programs_id = env.register_bundle(bundle.units, bundle.hash)
+    # the server evicts the least recently registered programs
+    env.mineflayer.server.programs.clear()
+    with pytest.raises(RuntimeError, match="not registered"):
+        env.step("await craftTable(bot);", programs_id=programs_id)
+    assert programs_id not in env.env.registered_programs
+    assert env.server_paused
+    # registering again recovers
+    programs_id = env.register_bundle(bundle.units, bundle.hash)
+    assert env.step("", programs_id=programs_id)[-1][0] == "observe"
+
+
+def bench_step_unknown_dependency(env, bundle):
+    programs_id = env.register_bundle(bundle.units, bundle.hash)
+    with pytest.raises(RuntimeError, match="Failed to step"):
+        env.step("await missing(bot);", programs_id=programs_id, dependencies=["x"])
+    assert env.server_paused
+
+
+def bench_register_after_disconnect(env, bundle):
+    env.mineflayer.server.drop_requests.append("programs")
+    programs_id = env.register_bundle(bundle.units, bundle.hash)
+    # sent again on a new connection
+    assert programs_id in env.mineflayer.server.programs
+    assert not env.mineflayer.server.drop_requests
+
+
+def bench_step_after_disconnect(env, bundle):
+    programs_id = env.register_bundle(bundle.units, bundle.hash)
+    env.mineflayer.server.drop_requests.append("step")
+    # the step may have run on the bot, so it is not sent again
+    with pytest.raises(aiohttp.ServerDisconnectedError):
+        env.step("", programs_id=programs_id)
+    assert env.step("", programs_id=programs_id)[-1][0] == "observe"
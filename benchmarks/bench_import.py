@@ -0,0 +1,62 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+# dependencies of the agents and the env, too slow for tools only needing
+# the data classes or the utils
+HEAVY_MODULES = [
+    "wandb",
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_community",
+    "javascript",
+    "minecraft_launcher_lib",
+    "gymnasium",
+    "aiohttp",
+    "pkg_resources",
+    "esprima",
+    "numpy",
+]
+LIGHT_MODULES = [
+    "voyager",
+    "voyager.classes",
+    "voyager.utils",
+    "voyager.agents",
+    "voyager.env",
+    "voyager.retrieval",
+    "voyager.resources",
+]
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Returns: module -> cumulative import time in us of every module imported
+      by ``import module`` in a fresh interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", LIGHT_MODULES)
+def bench_import(benchmark, module):
+    times = benchmark.pedantic(import_times, args=(module,), rounds=3, iterations=1)
+    benchmark.extra_info["import_us"] = times[module]
+    heavy = [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+    assert not heavy, f"import {module} imports {sorted(heavy)}"
@@ -0,0 +1,99 @@
+import pytest
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+from voyager.utils import llm_cache
+from voyager.utils.llm_cache import CachedChatModel, LLMCache, set_llm_cache
+
+MESSAGES = [
+    SystemMessage(content="You are a helpful assistant that writes Mineflayer code."),
+    HumanMessage(content="Task: Mine 1 oak log"),
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+class CountingModel:
+    """
+    Chat model answering every call with a new numbered response.
+    """
+
+    model_name = "counting"
+    temperature = 0
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, input, config=None, **kwargs) -> AIMessage:
+        self.calls += 1
+        return AIMessage(content=f"response {self.calls}")
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache():
+    cache = LLMCache(":memory:")
+    set_llm_cache(cache)
+    yield cache
+    set_llm_cache(None)
+    cache.close()
+
+
+def bench_cache_get(benchmark, cache):
+    key = LLMCache.get_key("gpt-4", 0, MESSAGES)
+    cache.put(key, "response")
+    assert benchmark(cache.get, key) == "response"
+
+
+def bench_cache_expiry(clock):
+    cache = LLMCache(":memory:", ttl=60)
+    cache.put("key", "response")
+    clock.now += 59
+    assert cache.get("key") == "response"
+    # the age counts from the creation, not from the last access
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.stats["entries"] == 0
+
+
+def bench_cache_eviction(clock):
+    cache = LLMCache(":memory:", ttl=None, max_bytes=30)
+    for key in ["a", "b", "c"]:
+        cache.put(key, "x" * 10)
+        clock.now += 1
+    assert cache.get("a") is not None
+    clock.now += 1
+    cache.put("d", "x" * 10)
+    # the least recently used entry goes first
+    assert cache.get("b") is None
+    assert [cache.get(key) is not None for key in ["a", "c", "d"]] == [True] * 3
+    for key in ["c", "a", "d"]:
+        clock.now += 1
+        cache.get(key)
+    clock.now += 1
+    cache.put("e", "x" * 20)
+    assert [cache.get(key) is not None for key in "acde"] == [False, False, True, True]
+
+
+def bench_invoke_retry_bypasses_cache(cache):
+    model = CountingModel()
+    llm = CachedChatModel(model)
+    assert llm.invoke(MESSAGES).content == "response 1"
+    assert llm.invoke(MESSAGES).content == "response 1"
+    assert model.calls == 1
+    # a retry asks the model again and replaces the cached answer
+    assert llm.invoke(MESSAGES, cache=False).content == "response 2"
+    assert model.calls == 2
+    assert llm.invoke(MESSAGES).content == "response 2"
+    assert model.calls == 2
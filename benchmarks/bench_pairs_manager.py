@@ -0,0 +1,16 @@
+import json
+
+from voyager.agents import PairsManager
+from voyager.classes import SubTask
+
+
+def bench_find_reworded_gather(benchmark, tmp_path):
+    # gather subtasks keep the -1 placeholder of Task as their quantity
+    with open(tmp_path / "pairs.json", "w") as f:
+        json.dump({"Gather -1 oak logs and place them in the chest.": "mineWoodLog"}, f)
+    pairs_manager = PairsManager(dir=str(tmp_path))
+    subtask = SubTask(action="gather", item="oak logs", quantity=-1)
+    subtask.generate_content()
+    assert subtask.content not in pairs_manager.pairs
+    skill, confidence = benchmark(pairs_manager.find_skill_name, subtask)
+    assert (skill, confidence) == ("mineWoodLog", 1.0)
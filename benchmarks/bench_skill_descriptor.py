@@ -0,0 +1,29 @@
+def bench_programs(benchmark, skill_manager):
+    descriptor = skill_manager.descriptor
+    benchmark(lambda: descriptor.programs)
+
+
+def bench_programs_after_new_skill(benchmark, skill_manager):
+    descriptor = skill_manager.descriptor
+    code = "async function benchSkill(bot) {\n  await mineBlock(bot, 'oak_log', 1);\n}"
+
+    def add_and_get_programs():
+        # a changed skill invalidates the bundle, like a relearned skill does
+        descriptor.bundle.add_skill(
+            "benchSkill", code + f"\n// {descriptor.bundle.version}"
+        )
+        return descriptor.programs
+
+    benchmark(add_and_get_programs)
+
+
+def bench_link(benchmark, skill_manager):
+    descriptor = skill_manager.descriptor
+    name = list(descriptor.skills)[-1]
+    benchmark(descriptor.bundle.link, f"await {name}(bot);")
+
+
+def bench_dependencies(benchmark, skill_manager):
+    descriptor = skill_manager.descriptor
+    name = list(descriptor.skills)[-1]
+    assert name in benchmark(descriptor.bundle.dependencies, f"await {name}(bot);")
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from conftest import SKILL_LIBRARIES
+from voyager.classes import SubTask
+
+CHESTS = {
+    "(-14, -60, 2)": {"oak_log": 12, "cobblestone": 32, "stick": 4},
+    "(-10, -60, 2)": {},
+    "(-6, -60, 2)": "Unknown",
+}
+
+
+@pytest.fixture
+def subtask() -> SubTask:
+    subtask = SubTask(
+        action="craft",
+        item="stone pickaxe",
+        quantity=1,
+        tools="crafting table",
+        materials="3 cobblestone, 2 sticks",
+    )
+    subtask.generate_content()
+    return subtask
+
+
+def bench_render_chest_observation(benchmark, skill_manager):
+    skill_manager.chest_memory = dict(CHESTS)
+    benchmark(skill_manager.render_chest_observation)
+
+
+def bench_update_chest_memory(benchmark, skill_manager):
+    # the same chests are observed after every step
+    skill_manager.update_chest_memory(CHESTS)
+    benchmark(skill_manager.update_chest_memory, CHESTS)
+
+
+def bench_get_status_message(benchmark, skill_manager, events, subtask):
+    skill_manager.chest_memory = dict(CHESTS)
+    code = next(iter(skill_manager.descriptor.skills.values()))["code"]
+    benchmark(
+        skill_manager.get_status_message,
+        events=events,
+        subtask=subtask,
+        code=code,
+        critique="Craft the sticks first.",
+    )
+
+
+def get_skill_text(skill_manager) -> str:
+    skills = list(skill_manager.descriptor.skills.values())[:3]
+    return (
+        "Explain: None\n\nPlan:\n1) Reuse the skills.\n\nCode:\n```javascript\n"
+        + "\n\n".join(skill["code"] for skill in skills)
+        + "\n```"
+    )
+
+
+def bench_extract_code(benchmark, skill_manager):
+    program_code, program_name, exec_code = benchmark(
+        skill_manager.extract_code, skill_text=get_skill_text(skill_manager)
+    )
+    assert program_name
+
+
+def bench_extract_code_babel(benchmark, skill_manager):
+    code = get_skill_text(skill_manager).split("```javascript")[1].split("```")[0]
+    program_code, program_name, exec_code = benchmark(
+        skill_manager._extract_code_babel, code
+    )
+    assert program_name
+
+
+def bench_build_skills_message(benchmark, skill_manager, subtask):
+    # uncached by subtask, as for every new subtask of a run
+    message, _ = benchmark(skill_manager._build_skills_message, subtask)
+    assert message.content
+
+
+@pytest.fixture
+def library_skill_manager(tmp_path):
+    from voyager.agents import SkillCritic, SkillDescriptor, SkillManager
+    from voyager.retrieval import HashingEmbedder, SkillRetriever
+
+    with open(f"{SKILL_LIBRARIES[0]}/skills.json") as f:
+        library = {name: skill["code"] for name, skill in json.load(f).items()}
+    names = sorted(library)
+    return SkillManager(
+        dir=str(tmp_path),
+        critic=SkillCritic(llm_type="gpt-4", mode="auto"),
+        descriptor=SkillDescriptor(dir=str(tmp_path), llm_type="gpt-3.5-turbo"),
+        llm_type="gpt-4",
+        resume=False,
+        retriever=SkillRetriever(HashingEmbedder(), names, names, code=library),
+    )
+
+
+def bench_link_retrieved_skills(benchmark, library_skill_manager, subtask):
+    library = library_skill_manager.retriever.code
+    library_skill_manager._retrieved_skills[subtask.content] = {
+        "mineTenCobblestone": library["mineTenCobblestone"]
+    }
+    benchmark(library_skill_manager.link_retrieved_skills, subtask)
+    bundle = library_skill_manager.descriptor.bundle
+    dependencies = bundle.dependencies("await mineTenCobblestone(bot);")
+    # the skills it calls are linked too
+    assert {"mineTenCobblestone", "craftWoodenPickaxe", "craftCraftingTable"} <= set(
+        dependencies
+    )
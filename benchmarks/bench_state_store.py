@@ -0,0 +1,78 @@
+import os
+import shutil
+
+import pytest
+
+from voyager.utils.state_store import JsonStore
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "skills.json")
+
+
+def bench_sync(benchmark, path):
+    store = JsonStore(path)
+    for i in range(1000):
+        store[f"skill{i}"] = {"code": "async function skill(bot) {}" * 10}
+    store.flush()
+
+    def change_and_sync():
+        store["skill0"] = {"code": f"async function skill(bot) {{}} // {len(store)}"}
+        del store["skill1"]
+        store["skill1"] = {"code": ""}
+        store.sync()
+
+    benchmark(change_and_sync)
+    assert JsonStore(path) == store
+
+
+def bench_recover_without_snapshot(path):
+    store = JsonStore(path)
+    store["a"] = 1
+    store["b"] = {"c": [1, 2]}
+    store.sync()
+    # crashed before the snapshot of the first checkpoint was written
+    os.remove(path)
+    assert dict(JsonStore(path)) == {"a": 1, "b": {"c": [1, 2]}}
+
+
+def bench_recover_stale_snapshot(path):
+    store = JsonStore(path)
+    store["a"] = 1
+    store["b"] = 2
+    store.flush()
+    store["a"] = 3
+    del store["b"]
+    store["c"] = 4
+    store.sync()
+    # crashed before the next checkpoint, while appending the last change
+    store["d"] = 5
+    store.sync()
+    with open(store.journal_path) as f:
+        journal = f.read()
+    with open(store.journal_path, "w") as f:
+        # the last line is cut
+        f.write(journal[:-4])
+    assert dict(JsonStore(path)) == {"a": 3, "c": 4}
+
+
+def bench_recover_during_snapshot(path):
+    store = JsonStore(path)
+    store["a"] = 1
+    store.sync()
+    store["a"] = 2
+    store["b"] = 3
+    store.sync()
+    shutil.copy(store.journal_path, f"{path}.journal.bak")
+    # crashed after the snapshot was replaced, before the journal was removed
+    store.flush()
+    shutil.move(f"{path}.journal.bak", store.journal_path)
+    with open(f"{path}.tmp", "w") as f:
+        f.write('{"a": ')
+    recovered = JsonStore(path)
+    assert dict(recovered) == {"a": 2, "b": 3}
+    # the next checkpoint drops the journal
+    recovered.flush()
+    assert not os.path.exists(store.journal_path)
+    assert dict(JsonStore(path)) == {"a": 2, "b": 3}
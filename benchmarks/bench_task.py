@@ -0,0 +1,22 @@
+import os
+
+import voyager.utils as U
+from voyager.classes import SubTask, Task
+
+from conftest import ROOT
+
+
+def bench_task_planning(benchmark, tmp_path, monkeypatch, task_name):
+    sub_tasks = U.load_json(os.path.join(ROOT, "tasks", task_name, "sub_tasks.json"))
+    content = U.load_text(os.path.join(ROOT, "tasks", task_name, "task_content.txt"))
+    # Task writes to tasks/<name>
+    monkeypatch.chdir(tmp_path)
+
+    def plan():
+        return Task(
+            name=task_name,
+            content=content,
+            sub_tasks=[SubTask(**sub_task) for sub_task in sub_tasks],
+        )
+
+    benchmark(plan)
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import voyager.utils as U
+from voyager.utils.json_utils import fix_and_parse_json
+
+CRITIC_RESPONSE = {
+    "reasoning": "The inventory has 1 stone_pickaxe, so the task is completed.",
+    "success": True,
+    "critique": "",
+}
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        json.dumps(CRITIC_RESPONSE, indent=4),
+        # unquoted keys and a missing brace, as LLMs sometimes answer
+        '{reasoning: "The chest has 3 sticks", success: false, critique: "Craft 2"}',
+        '{"reasoning": "The chest has 3 sticks", "success": false, "critique": ""',
+    ],
+    ids=["valid", "unquoted_keys", "missing_brace"],
+)
+def bench_fix_and_parse_json(benchmark, response):
+    assert isinstance(benchmark(fix_and_parse_json, response), dict)
+
+
+def bench_event_recorder_record(benchmark, tmp_path, events):
+    recorder = U.EventRecorder(ckpt_dir=str(tmp_path))
+    benchmark(recorder.record, events, "Craft 1 stone pickaxe")
@@ -0,0 +1,74 @@
+"""
+Benchmarks of the Python control loop, on the tasks in ``tasks/`` and the
+skill libraries in ``skill_library/``.
+
+    pip install -e .[bench]
+    python -m pytest benchmarks
+
+Every run is saved in ``.benchmarks/`` with the commit it ran on. To compare
+with the previous run, failing on a mean regression over 10%:
+
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+
+import glob
+import json
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+TASKS = sorted(os.path.basename(path) for path in glob.glob(f"{ROOT}/tasks/*"))
+SKILL_LIBRARIES = sorted(glob.glob(f"{ROOT}/skill_library/trial*/skill"))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def llm_config():
+    # agents build their LangChain models, which are never called here
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "bench")
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://bench.invalid")
+    os.environ.setdefault("OPENAI_API_VERSION", "2023-05-15")
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return json.load(f)
+
+
+@pytest.fixture(params=["events_checkpoint.json", "events_skill.json"])
+def events(request) -> list:
+    return load_fixture(request.param)
+
+
+@pytest.fixture(params=TASKS)
+def task_name(request) -> str:
+    return request.param
+
+
+@pytest.fixture(params=SKILL_LIBRARIES, ids=lambda path: path.split(os.sep)[-2])
+def skill_library(request) -> dict:
+    with open(os.path.join(request.param, "skills.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def skill_manager(tmp_path, skill_library):
+    from voyager.agents import SkillCritic, SkillDescriptor, SkillManager
+
+    with open(tmp_path / "skills.json", "w") as f:
+        json.dump(
+            {
+                name: {"code": skill["code"], "executable_code": skill["code"]}
+                for name, skill in skill_library.items()
+            },
+            f,
+        )
+    return SkillManager(
+        dir=str(tmp_path),
+        critic=SkillCritic(llm_type="gpt-4", mode="auto"),
+        descriptor=SkillDescriptor(dir=str(tmp_path), llm_type="gpt-3.5-turbo"),
+        llm_type="gpt-4",
+        resume=False,
+    )
@@ -0,0 +1,53 @@
+"""
+Compares the bridge response protocols on recorded step events.
+
+    python benchmarks/protocol.py [fixture.json ...]
+
+Protocol 1 is what index.js sends with ``res.json(bot.observe())``: the
+events JSON string encoded as a JSON string again, decoded twice by the
+bridge. Protocol 2 sends the events JSON as the body, optionally gzipped.
+"""
+
+import glob
+import gzip
+import json
+import os
+import sys
+import timeit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def encode(events: list) -> dict:
+    observation = json.dumps(events, separators=(",", ":"))
+    return {
+        "v1": json.dumps(observation).encode("utf-8"),
+        "v2": observation.encode("utf-8"),
+        "v2+gzip": gzip.compress(observation.encode("utf-8")),
+    }
+
+
+DECODERS = {
+    "v1": lambda body: json.loads(json.loads(body)),
+    "v2": lambda body: json.loads(body),
+    "v2+gzip": lambda body: json.loads(gzip.decompress(body)),
+}
+
+
+def bench(fixture: str, number: int = 2000) -> None:
+    with open(fixture) as f:
+        events = json.load(f)
+    print(f"{os.path.basename(fixture)} ({len(events)} events)")
+    for name, body in encode(events).items():
+        decode = DECODERS[name]
+        assert decode(body) == events
+        seconds = min(timeit.repeat(lambda: decode(body), number=number, repeat=5))
+        print(
+            f"  {name:8} {len(body):8d} bytes {seconds / number * 1e6:10.1f} us/decode"
+        )
+
+
+if __name__ == "__main__":
+    fixtures = sys.argv[1:] or sorted(glob.glob(f"{FIXTURES_DIR}/events_*.json"))
+    for fixture in fixtures:
+        bench(fixture)
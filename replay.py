@@ -0,0 +1,97 @@
+"""
+Replays a run recorded by test.py (with TRACE set) without a Minecraft server
+nor API keys, to measure the orchestration overhead of Voyager.
+
+    python replay.py traces/test.jsonl.gz [--profile]
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import time
+
+import voyager.utils as U
+import wandb
+from voyager import Voyager
+from voyager.agents import (
+    PairsManager,
+    SkillCritic,
+    SkillDescriptor,
+    SkillManager,
+    TaskCritic,
+    TaskManager,
+)
+from voyager.retrieval import HashingEmbedder, SkillRetriever
+from voyager.utils.trace import ReplayEnv, Trace, set_trace
+
+
+def replay(trace: Trace) -> Voyager:
+    # the models are never called, but LangChain checks their settings
+    os.environ.setdefault("OPENAI_API_KEY", "replay")
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "replay")
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://replay.invalid")
+    os.environ.setdefault("OPENAI_API_VERSION", "2023-05-15")
+
+    name = f"replay_{trace.meta['task']}"
+    U.f_remove(f"tasks/{name}")
+    U.f_mkdir(f"tasks/{name}")
+    U.dump_json(trace.meta["sub_tasks"], f"tasks/{name}/sub_tasks.json", indent=2)
+
+    # same agents as test.py, so the requests hash to the recorded ones
+    task_manager = TaskManager(
+        llm_type="gpt-4",
+        critic=TaskCritic(
+            llm_type="gpt-4",
+            mode="auto",
+        ),
+        name=name,
+        content=trace.meta["content"],
+    )
+    skill_manager = SkillManager(
+        dir=task_manager.dir,
+        resume=False,
+        llm_type="gpt-4",
+        critic=SkillCritic(
+            llm_type="gpt-4",
+            mode="auto",
+        ),
+        descriptor=SkillDescriptor(dir=task_manager.dir, llm_type="gpt-3.5-turbo"),
+        retriever=SkillRetriever.from_chroma(
+            "skill_library/trial1/skill", embedder=HashingEmbedder()
+        ),
+    )
+    voyager = Voyager(
+        env=ReplayEnv(trace),
+        skill_manager=skill_manager,
+        pairs_manager=PairsManager(dir=task_manager.dir),
+        speculate=trace.meta.get("speculate", False),
+    )
+    try:
+        voyager.reset(starting_position=(-14, -60, -4))
+        voyager.run_tasks(task_manager.task.sub_tasks)
+    finally:
+        voyager.close()
+    return voyager
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded Voyager run")
+    parser.add_argument("trace")
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    wandb.init(project="Co-Voyager", name="replay", mode="disabled")
+    trace = Trace(args.trace, mode="replay")
+    set_trace(trace)
+    profiler = cProfile.Profile() if args.profile else None
+    start_time = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    replay(trace)
+    if profiler:
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(30)
+    print(
+        f"\033[32mReplayed {args.trace} in {time.perf_counter() - start_time:.2f}s\033[0m"
+    )
@@ -1,11 +1,13 @@
 import pathlib
 import pkg_resources
 from setuptools import setup, find_packages
-
+from setuptools.command.build_py import build_py
 
 PKG_NAME = "voyager"
 VERSION = "0.1"
-EXTRAS = {}
+EXTRAS = {
+    "bench": ["pytest", "pytest-benchmark"],
+}
 
 
 def _read_file(fname):
@@ -22,6 +24,20 @@ def _read_install_requires():
         ]
 
 
+class BuildPyWithResources(build_py):
+    """
+    Also archives the prompts and control primitives into the built package,
+    which then loads them from a single file.
+    """
+
+    def run(self):
+        super().run()
+        if not self.dry_run:
+            from voyager.resources import build_archive
+
+            build_archive(self.build_lib)
+
+
 def _fill_extras(extras):
     if extras:
         extras["all"] = list(set([item for group in extras.values() for item in group]))
@@ -48,6 +64,7 @@ setup(
     zip_safe=False,
     install_requires=_read_install_requires(),
     extras_require=_fill_extras(EXTRAS),
+    cmdclass={"build_py": BuildPyWithResources},
     python_requires=">=3.9",
     classifiers=[
         "Development Status :: 5 - Production/Stable",
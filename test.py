@@ -1,5 +1,6 @@
 import os
 
+import voyager.utils as U
 import wandb
 from voyager import Voyager
 from voyager.agents import (
@@ -10,12 +11,25 @@ from voyager.agents import (
     TaskCritic,
     TaskManager,
 )
+from voyager.retrieval import HashingEmbedder, SkillRetriever
 from voyager.utils.components import get_environment
 from voyager.utils.config import get_azure_login, set_openai_config
+from voyager.utils.llm_cache import LLMCache, set_llm_cache
+from voyager.utils.trace import RecordingEnv, Trace, set_trace
 
 os.environ["WANDB_MODE"] = "offline"
 RESUME = False
 INDEX_TASK = 0
+# e.g. "traces/test.jsonl.gz" to record the run for replay.py
+TRACE = None
+# generate the next subtask's first program while the current one runs
+SPECULATE = False
+# e.g. ".cache/llm.sqlite" to answer repeated prompts of reruns and resumes
+# without calling the API
+LLM_CACHE = None
+# e.g. "skill_library/trial1/skill" to show the most relevant library skills
+# in the prompts
+SKILL_LIBRARY = None
 
 wandb.init(
     project="Co-Voyager",
@@ -23,6 +37,9 @@ wandb.init(
 )
 
 set_openai_config()
+set_llm_cache(LLMCache(LLM_CACHE) if LLM_CACHE else None)
+trace = Trace(TRACE) if TRACE else None
+set_trace(trace)
 
 task_manager = TaskManager(
     llm_type="gpt-4",
@@ -41,17 +58,31 @@ skill_manager = SkillManager(
         mode="auto",
     ),
     descriptor=SkillDescriptor(dir=task_manager.dir, llm_type="gpt-3.5-turbo"),
+    retriever=(
+        SkillRetriever.from_chroma(SKILL_LIBRARY, embedder=HashingEmbedder())
+        if SKILL_LIBRARY
+        else None
+    ),
 )
 pairs_manager = PairsManager(dir=task_manager.dir)
 
 env = get_environment(
     azure_login=get_azure_login(), server_port=3000, request_timeout=200, resume=RESUME
 )
+if trace:
+    env = RecordingEnv(env, trace)
+    trace.set_meta(
+        task=task_manager.task.name,
+        content=task_manager.task.content,
+        sub_tasks=U.load_json(task_manager.sub_tasks_path),
+        speculate=SPECULATE,
+    )
 
 voyager = Voyager(
     env=env,
     skill_manager=skill_manager,
     pairs_manager=pairs_manager,
+    speculate=SPECULATE,
 )
 
 voyager.reset(starting_position=(-14, -60, -4))
@@ -59,9 +90,7 @@ voyager.reset(starting_position=(-14, -60, -4))
 # if RESUME:
 # task_manager.task.sub_tasks = task_manager.task.sub_tasks[INDEX_TASK:]
 
-for i, sub_task in enumerate(task_manager.task.sub_tasks):
-    index = i + INDEX_TASK if RESUME else i
-    voyager.learn_task(sub_task=sub_task, index=index)
+voyager.run_tasks(task_manager.task.sub_tasks, start_index=INDEX_TASK if RESUME else 0)
 
 # for i, sub_task in enumerate(task_manager.task.sub_tasks):
 #    index = i + INDEX_TASK if RESUME else i
@@ -70,4 +99,6 @@ for i, sub_task in enumerate(task_manager.task.sub_tasks):
 
 wandb.finish()
 
-voyager.env.close()
+voyager.close()
+if trace:
+    trace.close()
@@ -1 +1,11 @@
-from .voyager import Voyager
+from typing import TYPE_CHECKING
+
+from .lazy_import import lazy_exports
+
+# submodules and exports are imported on first use, so tools only needing
+# voyager.classes or voyager.utils skip wandb, LangChain and the env
+__getattr__, __dir__ = lazy_exports(__name__, {"Voyager": ".voyager"})
+__all__ = ["Voyager"]
+
+if TYPE_CHECKING:
+    from .voyager import Voyager
@@ -1,6 +1,31 @@
-from .pairs_manager import PairsManager
-from .skill_critic import SkillCritic
-from .skill_manager import SkillManager
-from .skill_descriptor import SkillDescriptor
-from .task_critic import TaskCritic
-from .task_manager import TaskManager
+from typing import TYPE_CHECKING
+
+from voyager.lazy_import import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "PairsManager": ".pairs_manager",
+        "SkillCritic": ".skill_critic",
+        "SkillManager": ".skill_manager",
+        "SkillDescriptor": ".skill_descriptor",
+        "TaskCritic": ".task_critic",
+        "TaskManager": ".task_manager",
+    },
+)
+__all__ = [
+    "PairsManager",
+    "SkillCritic",
+    "SkillManager",
+    "SkillDescriptor",
+    "TaskCritic",
+    "TaskManager",
+]
+
+if TYPE_CHECKING:
+    from .pairs_manager import PairsManager
+    from .skill_critic import SkillCritic
+    from .skill_descriptor import SkillDescriptor
+    from .skill_manager import SkillManager
+    from .task_critic import TaskCritic
+    from .task_manager import TaskManager
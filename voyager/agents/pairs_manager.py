@@ -1,37 +1,130 @@
+import re
 from dataclasses import dataclass
-from typing import Union
+from difflib import SequenceMatcher
+from typing import Optional
 
-from langchain_community.chat_models import ChatOllama
-from langchain_openai.chat_models import ChatOpenAI
-from langchain_openai.chat_models.azure import AzureChatOpenAI
+from voyager.classes.subtask import SubTask
+from voyager.utils.state_store import JsonStore
 
-import voyager.utils as U
-from voyager.utils.llms import get_llm
+# stations are placed next to the chest, SubTask.generate_content leaves them out
+STATIONS = ["crafting table", "furnace"]
+CONTENT_PATTERN = re.compile(
+    r"^(?P<action>\w+) (?P<quantity>-?\d+) (?P<item>.+?)"
+    r"(?= and place | using killMob|\.|$)"
+    r"(?:.*Then place the (?P<tools>.+) back in the chest\.)?"
+)
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join(name.lower().replace("_", " ").split())
+
+
+@dataclass(frozen=True)
+class PairKey:
+
+    action: str
+    item: str
+    # a learned skill gathers or crafts the quantity it was learned for
+    quantity: int
+    tools: tuple[str, ...]
+
+    @classmethod
+    def from_fields(
+        cls, action: str, item: str, quantity: int, tools: list[str]
+    ) -> "PairKey":
+        item = _normalize_name(item)
+        if item.endswith("s"):
+            item = item[:-1]
+        tools = [_normalize_name(tool) for tool in tools]
+        # as in SubTask.generate_content, the tools are left out of the
+        # content when the first one is a station
+        if tools and tools[0] in STATIONS:
+            tools = []
+        return cls(
+            action=action.lower(),
+            item=item,
+            quantity=int(quantity),
+            tools=tuple(sorted(tools)),
+        )
+
+    @classmethod
+    def from_subtask(cls, subtask: SubTask) -> "PairKey":
+        return cls.from_fields(
+            subtask.action, subtask.item, subtask.quantity, subtask.tools
+        )
+
+    @classmethod
+    def from_content(cls, content: str) -> Optional["PairKey"]:
+        match = CONTENT_PATTERN.match(content)
+        if match is None:
+            return None
+        tools = match["tools"].split(" and the ") if match["tools"] else []
+        return cls.from_fields(
+            match["action"], match["item"], int(match["quantity"]), tools
+        )
+
+    def similarity(self, other: "PairKey") -> float:
+        if self.action != other.action or self.quantity != other.quantity:
+            return 0.0
+        item = SequenceMatcher(None, self.item, other.item).ratio()
+        if item < 0.9:
+            # "iron ingot" and "gold ingot" are different items, however close
+            return 0.0
+        tools = set(self.tools) | set(other.tools)
+        tools = len(set(self.tools) & set(other.tools)) / len(tools) if tools else 1.0
+        return 0.8 * item + 0.2 * tools
 
 
 @dataclass
 class PairsManager:
 
-    # llm: Union[AzureChatOpenAI, ChatOpenAI, ChatOllama]
     file_path: str
-    pairs: dict
+    pairs: JsonStore
+    threshold: float = 0.85
 
-    def __init__(
-        self, dir: str
-    ) -> None:  # ,llm_type: str, temperature: int, request_timeout: int):
-        # self.llm = get_llm(llm_type, temperature, request_timeout)
+    def __init__(self, dir: str, threshold: float = 0.85) -> None:
         self.file_path = f"{dir}/pairs.json"
-        if U.f_exists(self.file_path):
-            self.pairs = U.load_json(self.file_path)
-        else:
-            self.pairs = {}
-            U.dump_json(self.pairs, self.file_path)
-
-    def add_new_pair(self, task: str, skill: str) -> None:
-        self.pairs[task] = skill
-        U.dump_json(self.pairs, self.file_path)
-
-    def get_skill_name(self, task: str) -> str:
-        if task not in self.pairs:
-            raise ValueError(f"Task {task} not found in pairs")
-        return self.pairs[task]
+        self.threshold = threshold
+        self.pairs = JsonStore(self.file_path)
+        self._index = {}
+        for task, skill in self.pairs.items():
+            key = PairKey.from_content(task)
+            if key is not None:
+                self._index[key] = skill
+
+    def add_new_pair(self, subtask: SubTask, skill: str) -> None:
+        self.pairs[subtask.content] = skill
+        self._index[PairKey.from_subtask(subtask)] = skill
+        self.pairs.sync()
+
+    def flush(self) -> None:
+        self.pairs.flush()
+
+    def find_skill_name(self, subtask: SubTask) -> tuple[Optional[str], float]:
+        """
+        Returns: the skill learned for the most similar subtask, or None when
+        no subtask reaches the threshold, and the confidence of the match
+        """
+        if subtask.content in self.pairs:
+            return self.pairs[subtask.content], 1.0
+        key = PairKey.from_subtask(subtask)
+        if key in self._index:
+            return self._index[key], 1.0
+        best_skill, best_score = None, 0.0
+        for other, skill in self._index.items():
+            score = key.similarity(other)
+            if score > best_score:
+                best_skill, best_score = skill, score
+        if best_score < self.threshold:
+            return None, best_score
+        return best_skill, best_score
+
+    def get_skill_name(self, subtask: SubTask) -> str:
+        skill, confidence = self.find_skill_name(subtask)
+        if skill is None:
+            raise ValueError(f"Task {subtask.content} not found in pairs")
+        if confidence < 1:
+            print(
+                f"\033[33mReusing {skill} for {subtask.content} (confidence {confidence:.2f})\033[0m"
+            )
+        return skill
@@ -16,6 +16,7 @@ class SkillCritic:
 
     llm: Union[AzureChatOpenAI, ChatOpenAI, ChatOllama]
     mode: str
+    system_prompt: str
 
     def __init__(
         self, llm_type: str, mode: str, temperature: int = 0, request_timeout: int = 240
@@ -23,6 +24,7 @@ class SkillCritic:
         self.llm = get_llm(llm_type, temperature, request_timeout)
         self.mode = mode
         assert self.mode in ["auto", "manual"]
+        self.system_prompt = load_prompt("skill_critic")
 
     def check_task_success(
         self, events: dict, task: str, chest_observation: str, max_retries: int = 5
@@ -49,7 +51,7 @@ class SkillCritic:
             success, critique = self._human_check_task_success()
         else:
             messages = [
-                SystemMessage(content=load_prompt("skill_critic")),
+                SystemMessage(content=self.system_prompt),
                 human_message,
             ]
             success, critique = self._ai_check_task_success(
@@ -108,7 +110,7 @@ class SkillCritic:
             confirmed = input("Confirm? (y/n)").lower() in ["y", ""]
         return success, critique
 
-    def _ai_check_task_success(self, messages, max_retries=5):
+    def _ai_check_task_success(self, messages, max_retries=5, cache=True):
         if max_retries == 0:
             print(
                 "\033[31mFailed to parse Critic Agent response. Consider updating your prompt.\033[0m"
@@ -118,7 +120,7 @@ class SkillCritic:
         if messages[1] is None:
             return False, ""
 
-        critic = self.llm.invoke(messages).content
+        critic = self.llm.invoke(messages, cache=cache).content
         print(f"\033[31m****Critic Agent ai message****\n{critic}\033[0m")
         try:
             response = fix_and_parse_json(critic)
@@ -131,4 +133,6 @@ class SkillCritic:
             return self._ai_check_task_success(
                 messages=messages,
                 max_retries=max_retries - 1,
+                # the cached response is the one that failed to parse
+                cache=False,
             )
@@ -6,54 +6,45 @@ from langchain_community.chat_models import ChatOllama
 from langchain_openai.chat_models import ChatOpenAI
 from langchain_openai.chat_models.azure import AzureChatOpenAI
 
-import voyager.utils as U
+from voyager.classes import ProgramBundle
 from voyager.control_primitives import load_control_primitives
 from voyager.prompts import load_prompt
 from voyager.utils.llms import get_llm
+from voyager.utils.state_store import JsonStore
 
 
 @dataclass
 class SkillDescriptor:
 
     llm: Union[AzureChatOpenAI, ChatOpenAI, ChatOllama]
-    skills: dict
+    skills: JsonStore
     control_primitives: list[str]
     file_path: str
+    bundle: ProgramBundle
 
     def __init__(
         self, dir: str, llm_type: str, temperature: int = 0, request_timeout: int = 240
     ):
         self.llm = get_llm(llm_type, temperature, request_timeout)
         self.file_path = f"{dir}/skills.json"
-        if U.f_exists(self.file_path):
-            self.skills = self._get_skills(self.file_path)
-        else:
-            self.skills = {}
-            U.dump_json(self.skills, self.file_path)
+        self.skills = JsonStore(self.file_path)
 
         self.control_primitives = load_control_primitives()
+        self.bundle = ProgramBundle(
+            skills={name: entry["code"] for name, entry in self.skills.items()},
+            control_primitives=self.control_primitives,
+        )
 
     @property
-    def programs(self):
-        programs = ""
-        for skill_name, entry in self.skills.items():
-            programs += f"{entry['code']}\n\n"
-        for primitives in self.control_primitives:
-            programs += f"{primitives}\n\n"
-        return programs
-
-    def _get_skills(self, file_path) -> dict:
-        skills_dict = U.load_json(file_path)
-        skills = {}
-        for skill_name, skill in skills_dict.items():
-            skills[skill_name] = {
-                "executable_code": skill["executable_code"],
-                "code": skill["code"],
-            }
-        return skills
+    def programs(self) -> str:
+        return self.bundle.code
 
     def add_new_skill(
-        self, program_name: str, program_code: str, full_code: str
+        self,
+        program_name: str,
+        program_code: str,
+        full_code: str,
+        description: str = None,
     ) -> None:
         # skill_description = self._generate_skill_description(program_name, program_code)
         # print(
@@ -64,7 +55,14 @@ class SkillDescriptor:
             # "description": skill_description,
             "executable_code": full_code,
         }
-        U.dump_json(self.skills, self.file_path)
+        if description is not None:
+            # the document the skill is retrieved by, again on resume
+            self.skills[program_name]["description"] = description
+        self.bundle.add_skill(program_name, program_code)
+        self.skills.sync()
+
+    def flush(self) -> None:
+        self.skills.flush()
 
     def _generate_skill_description(self, program_name: str, program_code: str) -> str:
         messages = [
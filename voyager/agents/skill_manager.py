@@ -1,10 +1,10 @@
 import re
+import threading
 import time
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Union
 
-from javascript import require
-from langchain.prompts import SystemMessagePromptTemplate
 from langchain.schema import HumanMessage, SystemMessage
 from langchain_community.chat_models import ChatOllama
 from langchain_openai.chat_models import ChatOpenAI
@@ -13,8 +13,10 @@ from langchain_openai.chat_models.azure import AzureChatOpenAI
 import voyager.utils as U
 from voyager.classes.subtask import SubTask
 from voyager.control_primitives_context import load_control_primitives_context
-from voyager.prompts import load_prompt
+from voyager.prompts import get_prompt_registry
+from voyager.retrieval import SkillRetriever
 from voyager.utils.llms import get_llm
+from voyager.utils.state_store import JsonStore
 
 from .skill_critic import SkillCritic
 from .skill_descriptor import SkillDescriptor
@@ -28,7 +30,10 @@ class SkillManager:
     descriptor: SkillDescriptor
     skills_path: str
     file_path: str
-    chest_memory: dict = field(default_factory=dict)
+    chest_memory: JsonStore
+    retriever: SkillRetriever = None
+    retrieval_k: int = 5
+    candidate_llm: Union[AzureChatOpenAI, ChatOpenAI, ChatOllama] = None
     MAX_RETRIES: int = 4
 
     def __init__(
@@ -40,16 +45,33 @@ class SkillManager:
         resume: bool,
         temperature: int = 0,
         request_timeout: int = 240,
+        retriever: SkillRetriever = None,
+        retrieval_k: int = 5,
+        candidate_temperature: float = 0.7,
     ):
         self.llm = get_llm(llm_type, temperature, request_timeout)
+        # several candidates of the same prompt are only useful if they differ,
+        # the model is built when they are first requested
+        self._candidate_llm_args = (llm_type, candidate_temperature, request_timeout)
         self.critic = critic
         self.descriptor = descriptor
+        self.retriever = retriever
+        self.retrieval_k = retrieval_k
+        # subtask content -> skills system message, which a speculative
+        # learner may prepare from another thread, and the skills it shows
+        self._skills_messages = {}
+        self._retrieved_skills = {}
+        self._lock = threading.Lock()
+        if self.retriever is not None:
+            # learned skills replace the library skills of the same name
+            skills = self.descriptor.skills
+            self.retriever.add_skills(
+                list(skills),
+                [skill.get("description", name) for name, skill in skills.items()],
+                {name: skill["code"] for name, skill in skills.items()},
+            )
         self.file_path = f"{dir}/chest_memory.json"
-        if U.f_exists(self.file_path) and resume:
-            self.chest_memory = U.load_json(self.file_path)
-        else:
-            self.chest_memory = {}
-            U.dump_json(self.chest_memory, self.file_path)
+        self.chest_memory = JsonStore(self.file_path, load=resume)
 
     def update_chest_memory(self, chests) -> None:
         for position, chest in chests.items():
@@ -67,7 +89,12 @@ class SkillManager:
                         f"\033[32mAction Agent saving chest {position}: {chest}\033[0m"
                     )
                     self.chest_memory[position] = chest
-        U.dump_json(self.chest_memory, self.file_path)
+        # only the chests that changed, the file is rewritten by flush
+        self.chest_memory.sync()
+
+    def flush(self) -> None:
+        self.chest_memory.flush()
+        self.descriptor.flush()
 
     def render_chest_observation(self) -> str:
         chests = []
@@ -85,8 +112,75 @@ class SkillManager:
         chests_content = "\n" + "\n".join(chests) if chests else "None"
         return f"Chests:{chests_content}\n\n"
 
-    def _get_skills_message(self) -> SystemMessage:
-        system_template = load_prompt("skill_template")
+    def retrieve_skills(self, subtask: SubTask) -> dict[str, str]:
+        """
+        Returns: name -> code of the skills most relevant to the subtask
+        """
+        if self.retriever is None:
+            return {}
+        skills = {}
+        for name in self.retriever.retrieve(subtask.content, k=self.retrieval_k):
+            code = self.retriever.code.get(name)
+            if code is not None:
+                skills[name] = code
+        print(
+            f"\033[33mSkill Manager retrieved {len(skills)} skills for {subtask.content}\033[0m"
+        )
+        return skills
+
+    def link_retrieved_skills(self, subtask: SubTask) -> None:
+        """
+        Adds the skills shown in the prompt of the subtask to the program
+        bundle, with the library skills they transitively call, so the
+        generated code can call them. A learned skill is never replaced by the
+        library skill of the same name.
+        """
+        with self._lock:
+            skills = dict(self._retrieved_skills.get(subtask.content, {}))
+        library = self.retriever.code if self.retriever is not None else {}
+        pending = list(skills)
+        while pending:
+            name = pending.pop()
+            if name in self.descriptor.skills:
+                continue
+            code = skills.get(name, library.get(name))
+            self.descriptor.bundle.add_skill(name, code)
+            for called in U.js_identifiers(code):
+                if called in library and called not in skills:
+                    skills[called] = library[called]
+                    pending.append(called)
+
+    def add_new_skill(
+        self, subtask: SubTask, program_name: str, program_code: str, full_code: str
+    ) -> None:
+        description = f"{program_name}: {subtask.content}"
+        self.descriptor.add_new_skill(
+            program_name=program_name,
+            program_code=program_code,
+            full_code=full_code,
+            description=description,
+        )
+        with self._lock:
+            if self.retriever is not None:
+                self.retriever.add_skill(program_name, description, program_code)
+            # the new skill may be retrieved for the next subtasks, programs
+            # already generated still link the skills they were shown
+            self._skills_messages.clear()
+
+    def prepare_skills_message(self, subtask: SubTask) -> SystemMessage:
+        with self._lock:
+            if subtask.content not in self._skills_messages:
+                message, retrieved = self._build_skills_message(subtask)
+                self._skills_messages[subtask.content] = message
+                self._retrieved_skills.setdefault(subtask.content, {}).update(retrieved)
+            return self._skills_messages[subtask.content]
+
+    def _get_skills_message(self, subtask: SubTask) -> SystemMessage:
+        return self.prepare_skills_message(subtask)
+
+    def _build_skills_message(
+        self, subtask: SubTask
+    ) -> tuple[SystemMessage, dict[str, str]]:
         base_skills = [
             "exploreUntil",
             "mineBlock",
@@ -96,15 +190,15 @@ class SkillManager:
             "useChest",
             "mineflayer",
         ]
-        programs = "\n\n".join(load_control_primitives_context(base_skills))
-        response_format = load_prompt("skill_response_format")
-        system_message_prompt = SystemMessagePromptTemplate.from_template(
-            system_template
+        retrieved = self.retrieve_skills(subtask)
+        programs = "\n\n".join(
+            load_control_primitives_context(base_skills) + list(retrieved.values())
         )
-        system_message = system_message_prompt.format(
-            programs=programs, response_format=response_format
+        prompts = get_prompt_registry()
+        system_message = prompts.template("skill_template").format(
+            programs=programs, response_format=prompts.prompt("skill_response_format")
         )
-        return system_message
+        return system_message, retrieved
 
     def get_status_message(
         self, events, subtask: SubTask, code="", critique: str = ""
@@ -180,67 +274,151 @@ class SkillManager:
         return HumanMessage(content=observation)
 
     def create_skill(
-        self, events: list, subtask: SubTask, code: str, critique: str
+        self,
+        events: list,
+        subtask: SubTask,
+        code: str,
+        critique: str,
+        cache: bool = True,
     ) -> str:
-        system_message = self._get_skills_message()
+        """
+        With ``cache=False`` the program is requested again even if the same
+        messages are cached, for retries after the cached one failed.
+        """
         human_message = self.get_status_message(
             events=events, code=code, subtask=subtask, critique=critique
         )
+        return self.create_skill_from_status(subtask, human_message, cache=cache)
+
+    def create_skill_from_status(
+        self, subtask: SubTask, human_message: HumanMessage, cache: bool = True
+    ) -> str:
+        """
+        Thread-safe part of create_skill, for learners generating the program
+        of a subtask while another one runs.
+        """
+        system_message = self._get_skills_message(subtask)
         messages = [system_message, human_message]
         print(
             f"\033[32m****Skill manager human message****\n{human_message.content}\033[0m"
         )
-        ai_message = self.llm.invoke(messages)
+        ai_message = self.llm.invoke(messages, cache=cache)
         return ai_message.content
 
+    def create_skills(
+        self,
+        events: list,
+        subtask: SubTask,
+        code: str,
+        critique: str,
+        k: int,
+        cache: bool = True,
+    ) -> list[str]:
+        """
+        Requests ``k`` programs concurrently, sampled at the candidate temperature.
+        """
+        system_message = self._get_skills_message(subtask)
+        human_message = self.get_status_message(
+            events=events, code=code, subtask=subtask, critique=critique
+        )
+        messages = [system_message, human_message]
+        print(
+            f"\033[32m****Skill manager human message****\n{human_message.content}\033[0m"
+        )
+        if self.candidate_llm is None:
+            self.candidate_llm = get_llm(*self._candidate_llm_args)
+        with ThreadPoolExecutor(max_workers=k) as executor:
+            futures = [
+                executor.submit(
+                    self.candidate_llm.invoke, messages, cache=cache, variant=i
+                )
+                for i in range(k)
+            ]
+        skill_texts = []
+        error = None
+        for future in futures:
+            try:
+                skill_texts.append(future.result().content)
+            except Exception as e:
+                error = e
+                print(f"\033[31mFailed to generate a candidate: {e}\033[0m")
+        if not skill_texts:
+            raise error
+        return skill_texts
+
+    def rank_candidates(self, skill_texts: list[str]) -> list[tuple[str, str, str]]:
+        """
+        Drops the programs that do not parse and orders the others by the
+        number of functions they call that are not defined anywhere.
+        Returns: (program_code, program_name, exec_code) of each valid program
+        """
+        candidates = []
+        for skill_text in skill_texts:
+            program_code, program_name, exec_code = self.extract_code(skill_text)
+            if not program_name:
+                continue
+            unknown = [
+                name
+                for name in U.js_undefined_calls(program_code)
+                if not self.descriptor.bundle.defines(name)
+            ]
+            if unknown:
+                print(
+                    f"\033[33m{program_name} calls unknown functions {unknown}\033[0m"
+                )
+            candidates.append((len(unknown), (program_code, program_name, exec_code)))
+        # sorted is stable, so ties keep the order of the samples
+        return [candidate for _, candidate in sorted(candidates, key=lambda c: c[0])]
+
     def extract_code(self, skill_text: str) -> tuple[str, str, str]:
+        code_pattern = re.compile(r"```(?:javascript|js)(.*?)```", re.DOTALL)
+        code = "\n".join(code_pattern.findall(str(skill_text)))
+        try:
+            functions = U.js_function_declarations(code)
+        except Exception as e:
+            # syntax newer than ES2017, or esprima is not installed
+            print(f"\033[33mParsing with esprima failed ({e}), using Babel\033[0m")
+            return self._extract_code_babel(code)
+        try:
+            return self._get_program(functions)
+        except Exception as e:
+            print(f"Error parsing action response (before program execution): {e}")
+            return "", "", ""
+
+    def _get_program(self, functions: list[dict]) -> tuple[str, str, str]:
+        assert len(functions) > 0, "No functions found"
+        # find the last async function
+        main_function = None
+        for function in reversed(functions):
+            if function["type"] == "AsyncFunctionDeclaration":
+                main_function = function
+                break
+        assert (
+            main_function is not None
+        ), "No async function found. Your main function must be async."
+        assert (
+            len(main_function["params"]) == 1 and main_function["params"][0] == "bot"
+        ), f"Main function {main_function['name']} must take a single argument named 'bot'"
+        program_code = "\n\n".join(function["body"] for function in functions)
+        exec_code = f"await {main_function['name']}(bot);"
+        return program_code, main_function["name"], exec_code
+
+    def _extract_code_babel(self, code: str) -> tuple[str, str, str]:
         retry = 3
         error = None
         while retry > 0:
             try:
-                babel = require("@babel/core")
-                babel_generator = require("@babel/generator").default
-
-                code_pattern = re.compile(r"```(?:javascript|js)(.*?)```", re.DOTALL)
-                code = "\n".join(code_pattern.findall(str(skill_text)))
-                parsed = babel.parse(code)
-                functions = []
-                assert len(list(parsed.program.body)) > 0, "No functions found"
-                for i, node in enumerate(parsed.program.body):
-                    if node.type != "FunctionDeclaration":
-                        continue
-                    node_type = (
-                        "AsyncFunctionDeclaration"
-                        if node["async"]
-                        else "FunctionDeclaration"
-                    )
-                    functions.append(
-                        {
-                            "name": node.id.name,
-                            "type": node_type,
-                            "body": babel_generator(node).code,
-                            "params": list(node["params"]),
-                        }
-                    )
-                # find the last async function
-                main_function = None
-                for function in reversed(functions):
-                    if function["type"] == "AsyncFunctionDeclaration":
-                        main_function = function
-                        break
-                assert (
-                    main_function is not None
-                ), "No async function found. Your main function must be async."
-                assert (
-                    len(main_function["params"]) == 1
-                    and main_function["params"][0].name == "bot"
-                ), f"Main function {main_function['name']} must take a single argument named 'bot'"
-                program_code = "\n\n".join(function["body"] for function in functions)
-                exec_code = f"await {main_function['name']}(bot);"
-                return program_code, main_function["name"], exec_code
+                functions = U.babel_function_declarations(code)
+                break
             except Exception as e:
                 retry -= 1
                 error = e
                 time.sleep(1)
-        print(f"Error parsing action response (before program execution): {error}")
-        return "", "", ""
+        else:
+            print(f"Error parsing action response (before program execution): {error}")
+            return "", "", ""
+        try:
+            return self._get_program(functions)
+        except Exception as e:
+            print(f"Error parsing action response (before program execution): {e}")
+            return "", "", ""
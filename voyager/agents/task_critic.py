@@ -24,7 +24,11 @@ class TaskCritic:
         assert self.mode in ["auto", "manual"]
 
     def get_critique(
-        self, content: str, old_sub_tasks: list[dict], error: Exception
+        self,
+        content: str,
+        old_sub_tasks: list[dict],
+        error: Exception,
+        cache: bool = True,
     ) -> str:
         if self.mode == "auto":
             messages = [
@@ -33,7 +37,7 @@ class TaskCritic:
                     content=f"Previous subdivision:\n{old_sub_tasks}\n\nError: {error}\n\nTask: {content}\n\nCritique:"
                 ),
             ]
-            critique = self.llm.invoke(messages).content.strip()
+            critique = self.llm.invoke(messages, cache=cache).content.strip()
         else:
             critique = input(
                 f"Please provide a critique for the following error: {error}\n\nTask: {content}\n\nPrevious subdivision:\n{old_sub_tasks}\n\nCritique: "
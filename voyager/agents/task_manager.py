@@ -32,11 +32,14 @@ class TaskManager:
         llm_type: str,
         temperature: int = 0,
         request_timeout: int = 240,
+        name: str = None,
+        content: str = None,
     ):
         self.llm = get_llm(llm_type, temperature, request_timeout)
         self.critic = critic
 
-        name, content = self._get_task_descriptors()
+        if name is None or content is None:
+            name, content = self._get_task_descriptors()
         self.dir = U.f_mkdir(f"tasks/{name}")
         with open(f"{self.dir}/task_content.txt", "w") as f:
             f.write(content)
@@ -77,15 +80,19 @@ class TaskManager:
                 parsed = True
                 break
             except Exception as e:
+                # a retry may send the messages of a cached attempt, whose
+                # answers led to this error
                 critique = self.critic.get_critique(
                     content=content,
                     old_sub_tasks=U.load_json(self.sub_tasks_path),
                     error=e,
+                    cache=False,
                 )
                 sub_tasks = self._ask_for_sub_tasks(
                     content=content,
                     old_sub_tasks=U.load_json(self.sub_tasks_path),
                     critique=critique,
+                    cache=False,
                 )
                 U.dump_json(sub_tasks, self.sub_tasks_path, indent=2)
                 sub_tasks = [SubTask(**sub_task) for sub_task in sub_tasks]
@@ -105,7 +112,11 @@ class TaskManager:
         return sub_tasks
 
     def _ask_for_sub_tasks(
-        self, content: str, old_sub_tasks: list[dict] = [], critique: str = ""
+        self,
+        content: str,
+        old_sub_tasks: list[dict] = [],
+        critique: str = "",
+        cache: bool = True,
     ) -> list[dict]:
         old_sub_tasks = old_sub_tasks if old_sub_tasks else "None"
         critique = critique if critique else "None"
@@ -114,6 +125,6 @@ class TaskManager:
             SystemMessage(content=load_prompt("task_response_format")),
             HumanMessage(content=hm_content),
         ]
-        response = self.llm.invoke(input=messages).content
+        response = self.llm.invoke(input=messages, cache=cache).content
         print(f"\033[33mTask Manager received response:\n{response}\033[0m")
         return fix_and_parse_json(response)
@@ -2,3 +2,4 @@ from .material import Material
 from .status import Status
 from .subtask import SubTask
 from .task import Task
+from .program_bundle import ProgramBundle, content_hash
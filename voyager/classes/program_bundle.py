@@ -0,0 +1,127 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+import voyager.utils as U
+
+
+def content_hash(programs: str) -> str:
+    return hashlib.sha256(programs.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ProgramBundle:
+
+    skills: dict[str, str] = field(default_factory=dict)
+    control_primitives: list[str] = field(default_factory=list)
+    version: int = 0
+
+    def __post_init__(self):
+        self._skills_code = None
+        self._primitives_code = "".join(
+            f"{primitive}\n\n" for primitive in self.control_primitives
+        )
+        self._code = None
+        self._units = None
+        self._hash = None
+        # per program unit (skill name or primitive index): defined and used names
+        self._unit_names = {}
+        self._unit_identifiers = {}
+        self._definitions = None
+
+    @property
+    def code(self) -> str:
+        if self._skills_code is None:
+            self._skills_code = "".join(f"{code}\n\n" for code in self.skills.values())
+        if self._code is None:
+            self._code = self._skills_code + self._primitives_code
+        return self._code
+
+    @property
+    def units(self) -> str:
+        """
+        JSON list of the [key, code] of every program unit, which the server
+        registers once and links steps from (see ``dependencies``)
+        """
+        if self._units is None:
+            self._units = json.dumps(
+                [[str(unit), self._get_unit_code(unit)] for unit in self._get_units()]
+            )
+        return self._units
+
+    @property
+    def hash(self) -> str:
+        if self._hash is None:
+            self._hash = content_hash(self.units)
+        return self._hash
+
+    def add_skill(self, name: str, code: str) -> None:
+        if self.skills.get(name) == code:
+            return
+        if name in self.skills:
+            # replacing a skill keeps its position, so the prefix must be rebuilt
+            self._skills_code = None
+        elif self._skills_code is not None:
+            self._skills_code += f"{code}\n\n"
+        self.skills[name] = code
+        self._unit_names.pop(name, None)
+        self._unit_identifiers.pop(name, None)
+        self._definitions = None
+        self._code = None
+        self._units = None
+        self._hash = None
+        self.version += 1
+
+    def defines(self, name: str) -> bool:
+        return name in self._get_definitions()
+
+    def dependencies(self, code: str) -> list[str]:
+        """
+        Returns: the keys in ``units`` of the programs ``code`` transitively
+          depends on, in bundle order
+        """
+        return [str(unit) for unit in self._link(code)]
+
+    def link(self, code: str) -> str:
+        """
+        Returns: the programs ``code`` transitively depends on, in bundle order
+        """
+        return "".join(f"{self._get_unit_code(unit)}\n\n" for unit in self._link(code))
+
+    def _link(self, code: str) -> list:
+        definitions = self._get_definitions()
+        linked = set()
+        pending = list(U.js_identifiers(code))
+        while pending:
+            for unit in definitions.get(pending.pop(), []):
+                if unit not in linked:
+                    linked.add(unit)
+                    pending.extend(self._get_unit_identifiers(unit))
+        return [unit for unit in self._get_units() if unit in linked]
+
+    def _get_units(self) -> list:
+        return [*self.skills, *range(len(self.control_primitives))]
+
+    def _get_unit_code(self, unit) -> str:
+        if isinstance(unit, int):
+            return self.control_primitives[unit]
+        return self.skills[unit]
+
+    def _get_unit_identifiers(self, unit) -> set[str]:
+        if unit not in self._unit_identifiers:
+            self._unit_identifiers[unit] = U.js_identifiers(self._get_unit_code(unit))
+        return self._unit_identifiers[unit]
+
+    def _get_definitions(self) -> dict[str, list]:
+        if self._definitions is None:
+            definitions = {}
+            for unit in self._get_units():
+                if unit not in self._unit_names:
+                    self._unit_names[unit] = U.js_function_names(
+                        self._get_unit_code(unit)
+                    )
+                for name in self._unit_names[unit]:
+                    # every definition is kept so the last one still wins in eval
+                    definitions.setdefault(name, []).append(unit)
+            self._definitions = definitions
+        return self._definitions
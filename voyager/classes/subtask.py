@@ -58,6 +58,14 @@ class SubTask:
 
         self.content_doing = f"{self.action}ing {self.quantity} {self.item}"
 
+    def depends_on(self, other: "SubTask") -> bool:
+        """
+        Returns: whether this subtask needs the item ``other`` produces
+        """
+        return other.item in self.tools or any(
+            material.name == other.item for material in self.materials
+        )
+
     def __str__(self) -> str:
         return f"{self.content} ({self.status.value})"
 
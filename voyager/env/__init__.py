@@ -1 +1,18 @@
-from .bridge import VoyagerEnv
+from typing import TYPE_CHECKING
+
+from voyager.lazy_import import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "AsyncVoyagerEnv": ".async_bridge",
+        "VoyagerEnv": ".bridge",
+        "VoyagerEnvPool": ".pool",
+    },
+)
+__all__ = ["AsyncVoyagerEnv", "VoyagerEnv", "VoyagerEnvPool"]
+
+if TYPE_CHECKING:
+    from .async_bridge import AsyncVoyagerEnv
+    from .bridge import VoyagerEnv
+    from .pool import VoyagerEnvPool
@@ -0,0 +1,410 @@
+import asyncio
+import json
+import os.path
+import time
+import warnings
+from typing import TYPE_CHECKING, AsyncIterator
+
+import aiohttp
+
+import voyager.utils as U
+from voyager.classes import content_hash
+
+from .process_monitor import SubProcess
+from .session import BridgeResponse, BridgeSession
+
+if TYPE_CHECKING:
+    from .minecraft_launcher import MinecraftInstance
+
+
+class AsyncVoyagerEnv:
+    def __init__(
+        self,
+        mc_port,
+        azure_login,
+        wait_ticks=50,
+        server_host="http://127.0.0.1",
+        max_iteractions=160,
+        server_port=3000,
+        username="bot",
+        request_timeout=600,
+        timeouts=None,
+        retries=3,
+        pause_in_step=True,
+        pause_server=True,
+        protocol=2,
+        compress=False,
+        reset_timeout=60,
+        log_path="./logs",
+    ):
+        if not mc_port and not azure_login:
+            raise ValueError("Either mc_port or azure_login must be specified")
+        if mc_port and azure_login:
+            warnings.warn(
+                "Both mc_port and mc_login are specified, mc_port will be ignored"
+            )
+        self.server = f"{server_host}:{server_port}"
+        self.server_port = server_port
+        self.username = username
+        self.max_iteractions = max_iteractions
+        self.request_timeout = request_timeout
+        self.session = BridgeSession(
+            self.server,
+            request_timeout=request_timeout,
+            timeouts=timeouts,
+            retries=retries,
+        )
+        self.wait_ticks = wait_ticks
+        # /pause pauses the whole Minecraft server, so bots sharing it must not
+        # pause it and the world keeps running
+        self.pause_server = pause_server
+        # let the server pause and resume itself around /start and /step
+        # instead of separate /pause round-trips
+        self.pause_in_step = pause_in_step and pause_server
+        self.reset_timeout = reset_timeout
+        # servers that do not know the protocol keep answering with version 1
+        self.protocol = protocol
+        self.compress = compress
+        self.reset_time = None
+        self.reset_times = []
+        self.log_path = log_path
+        self.mineflayer = self.get_mineflayer_process(server_port)
+        if azure_login:
+            self.mc_instance = self.get_mc_instance(azure_login)
+            self.mc_port = self._start_minecraft_server()
+        else:
+            self.mc_instance = None
+            self.mc_port = mc_port
+        self.has_reset = False
+        self.reset_options = None
+        self.connected = False
+        self.server_paused = False
+        self.registered_programs = set()
+
+    def get_mineflayer_process(self, server_port: int) -> SubProcess:
+        print("Creating Mineflayer process")
+        U.f_mkdir(self.log_path, "mineflayer")
+        file_path = os.path.abspath(os.path.dirname(__file__))
+        return SubProcess(
+            commands=[
+                "node",
+                U.f_join(file_path, "mineflayer/index.js"),
+                str(server_port),
+            ],
+            name=f"mineflayer_{server_port}",
+            ready_match=r"Server started on port (\d+)",
+            log_path=U.f_join(self.log_path, "mineflayer"),
+        )
+
+    def get_mc_instance(self, azure_login: dict) -> "MinecraftInstance":
+        # minecraft_launcher_lib is only needed to launch a local instance
+        from .minecraft_launcher import MinecraftInstance
+
+        print("Creating Minecraft server")
+        U.f_mkdir(self.log_path, "minecraft")
+        return MinecraftInstance(
+            client_id=azure_login["client_id"],
+            redirect_url=azure_login["redirect_url"],
+            secret_value=azure_login["secret_value"],
+            version=azure_login["version"],
+            mineflayer=self.mineflayer,
+            log_path=U.f_join(self.log_path, "minecraft"),
+        )
+
+    def _start_minecraft_server(self) -> int:
+        if not self.mc_instance or self.mc_instance.is_running:
+            raise RuntimeError("Minecraft server is already running")
+        print("Starting Minecraft server")
+        self.mc_instance.run()
+        print(f"Server started on port {self.mc_instance.port}")
+        return self.mc_instance.port
+
+    async def _start_mineflayer(self, options: dict) -> list:
+        if not self.mineflayer or self.mineflayer.is_running:
+            raise RuntimeError("Mineflayer process is already running")
+        print("Starting Mineflayer process")
+        started = False
+        backoff = 0.5
+        for _ in range(3):
+            if await asyncio.to_thread(self.mineflayer.start, self.reset_timeout):
+                started = True
+                break
+            await asyncio.to_thread(self.mineflayer.stop, self.reset_timeout)
+            await asyncio.sleep(backoff)
+            backoff *= 2
+        if not started:
+            raise RuntimeError("Mineflayer process failed to start")
+        print(self.mineflayer.ready_line)
+        res = await self.session.post("start", json=options)
+        if res.status_code != 200:
+            await asyncio.to_thread(self.mineflayer.stop)
+            raise RuntimeError(f"Minecraft server reply with code {res.status_code}")
+        last_events = self._parse_events(res)
+        return last_events
+
+    async def reset(
+        self,
+        mode: str = "hard",
+        inventory: dict = {},
+        equipment: list = [],
+        spread: bool = False,
+        position=None,
+        time_of_day=None,
+    ) -> list:
+        """
+        A soft reset reuses the bot, moves it and sets the time of day in one
+        /reset request, and replaces its inventory only when ``inventory`` or
+        ``equipment`` is given.
+        """
+        if mode not in ["hard", "soft"]:
+            raise ValueError(f"Invalid reset mode {mode}")
+
+        start_time = time.perf_counter()
+        options = {
+            "port": self.mc_port,
+            "username": self.username,
+            "reset": mode,
+            "inventory": inventory,
+            "equipment": equipment,
+            "spread": spread,
+            "waitTicks": self.wait_ticks,
+            "position": position,
+            "time": time_of_day,
+            "pause": self.pause_in_step,
+            "protocol": self.protocol,
+            "compress": self.compress,
+        }
+        last_events = None
+        if mode == "soft" and self.connected and self.mineflayer.is_running:
+            last_events = await self._soft_reset(options)
+        if last_events is None:
+            await self.unpause()
+            await asyncio.to_thread(self.mineflayer.stop, self.reset_timeout)
+            await self._wait_for_port_release()
+            self.registered_programs.clear()
+            if inventory or any(equipment):
+                # /start gives the items of hard resets only
+                options["reset"] = "hard"
+            last_events = await self._start_mineflayer(options)
+        self.has_reset = True
+        self.connected = True
+        if self.pause_in_step:
+            self.server_paused = True
+        else:
+            await self.pause()
+        self.reset_time = time.perf_counter() - start_time
+        self.reset_times.append(self.reset_time)
+        return last_events
+
+    async def _soft_reset(self, options: dict):
+        if not self.pause_in_step:
+            await self.unpause()
+        try:
+            res = await self.session.post("reset", json=options)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"\033[31mSoft reset failed: {e}, doing a hard reset\033[0m")
+            return None
+        if res.status_code != 200:
+            print(
+                f"\033[31mSoft reset failed with code {res.status_code}, doing a hard reset\033[0m"
+            )
+            return None
+        return self._parse_events(res)
+
+    async def _wait_for_port_release(self) -> None:
+        deadline = time.monotonic() + self.reset_timeout
+        while time.monotonic() < deadline:
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection("127.0.0.1", self.server_port), 0.5
+                )
+            except (OSError, asyncio.TimeoutError):
+                return
+            writer.close()
+            await asyncio.sleep(0.05)
+        raise RuntimeError(f"Port {self.server_port} was not released")
+
+    async def is_healthy(self) -> bool:
+        if not self.connected or not self.mineflayer.is_running:
+            return False
+        try:
+            res = await self.session.get("health")
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+        return res.status_code == 200 and res.json()["bot"]
+
+    async def register_programs(self, programs: str, programs_id: str = None) -> str:
+        return await self._register("programs", programs, programs_id)
+
+    async def register_bundle(self, units: str, programs_id: str = None) -> str:
+        """
+        Registers the ProgramBundle.units a step then links with its
+        ``dependencies``, so the bundle is uploaded once per version.
+        """
+        return await self._register("units", units, programs_id)
+
+    async def _register(self, key: str, programs: str, programs_id: str) -> str:
+        if programs_id is None:
+            programs_id = content_hash(programs)
+        if programs_id in self.registered_programs:
+            return programs_id
+        data = {
+            "id": programs_id,
+            key: programs,
+        }
+        res = await self.session.post("programs", json=data)
+        if res.status_code != 200:
+            raise RuntimeError(
+                f"Failed to register programs with code {res.status_code}"
+            )
+        self.registered_programs.add(programs_id)
+        return programs_id
+
+    async def step(
+        self,
+        code: str,
+        programs: str = "",
+        programs_id: str = None,
+        dependencies: list[str] = None,
+    ) -> list:
+        """
+        Cancelling the step aborts the evaluation on the server.
+        """
+        data = await self._get_step_data(
+            code, programs, programs_id, dependencies, stream=False
+        )
+        try:
+            res = await self.session.post("step", json=data)
+        except asyncio.CancelledError:
+            await self._abort_cancelled()
+            raise
+        try:
+            self._check_step_response(res, programs_id)
+        finally:
+            # a failed step must not leave the world running either
+            await self._after_step()
+        returned_data = self._parse_events(res)
+        return returned_data
+
+    async def step_stream(
+        self,
+        code: str,
+        programs: str = "",
+        programs_id: str = None,
+        dependencies: list[str] = None,
+    ) -> AsyncIterator[list]:
+        """
+        Yields the events of the step as the server emits them, ending with
+        the final observe event. Closing the generator early aborts the step.
+        """
+        data = await self._get_step_data(
+            code, programs, programs_id, dependencies, stream=True
+        )
+        try:
+            async with self.session.stream("step", json=data) as res:
+                if res.status != 200:
+                    text = await res.text()
+                    self._check_step_response(
+                        BridgeResponse(res.status, res.headers, text), programs_id
+                    )
+                async for line in res.content:
+                    if line.strip():
+                        yield json.loads(line)
+        finally:
+            await self._after_step()
+
+    async def abort(self) -> None:
+        res = await self.session.post("abort")
+        if res.status_code != 200:
+            raise RuntimeError(f"Failed to abort step with code {res.status_code}")
+
+    async def _abort_cancelled(self) -> None:
+        try:
+            await self.abort()
+        except Exception as e:
+            print(f"\033[31mFailed to abort the cancelled step: {e}\033[0m")
+
+    async def _get_step_data(
+        self,
+        code: str,
+        programs: str,
+        programs_id: str,
+        dependencies: list[str],
+        stream: bool,
+    ) -> dict:
+        if not self.has_reset:
+            raise RuntimeError("Environment has not been reset yet")
+        if not self.pause_in_step:
+            await self.unpause()
+        data = {
+            "code": code,
+            "pause": self.pause_in_step,
+            "stream": stream,
+            "protocol": self.protocol,
+            "compress": self.compress,
+        }
+        if programs_id:
+            data["programs_id"] = programs_id
+            if dependencies is not None:
+                data["dependencies"] = dependencies
+        else:
+            data["programs"] = programs
+        return data
+
+    def _check_step_response(self, res: BridgeResponse, programs_id: str) -> None:
+        if res.status_code == 404 and programs_id:
+            # the server dropped the programs, they must be registered again
+            self.registered_programs.discard(programs_id)
+            raise RuntimeError(f"Programs {programs_id} are not registered")
+        if res.status_code != 200:
+            raise RuntimeError("Failed to step Minecraft server")
+
+    def _parse_events(self, res: BridgeResponse) -> list:
+        if res.headers.get("X-Voyager-Protocol") == "2":
+            return res.json()
+        return json.loads(res.json())
+
+    async def _after_step(self) -> None:
+        if self.pause_in_step:
+            self.server_paused = True
+        else:
+            await self.pause()
+
+    async def close(self) -> None:
+        if not self.pause_in_step or not self.connected:
+            await self.unpause()
+        if self.connected:
+            res = await self.session.post("stop", json={"pause": self.pause_in_step})
+            if res.status_code == 200:
+                self.connected = False
+                self.server_paused = False
+            else:
+                raise RuntimeError(
+                    f"Failed to stop Minecraft server with code {res.status_code}"
+                )
+        if self.mc_instance:
+            await asyncio.to_thread(self.mc_instance.stop)
+        await asyncio.to_thread(self.mineflayer.stop)
+        await self.session.close()
+
+    async def pause(self) -> None:
+        if self.server_paused or not self.pause_server:
+            return
+        res = await self.session.post("pause")
+        if res.status_code == 200:
+            self.server_paused = True
+        else:
+            raise RuntimeError(
+                f"Failed to pause Minecraft server with code {res.status_code}"
+            )
+
+    async def unpause(self) -> None:
+        if not self.server_paused or not self.pause_server:
+            return
+        res = await self.session.post("pause")
+        if res.status_code == 200:
+            self.server_paused = False
+        else:
+            raise RuntimeError(
+                f"Failed to unpause Minecraft server with code {res.status_code}"
+            )
@@ -1,20 +1,20 @@
-import json
-import os.path
-import time
-import warnings
-from typing import Any, Dict, SupportsFloat, Tuple
+import asyncio
+import threading
+from typing import Iterator
 
 import gymnasium as gym
-import requests
-from gymnasium.core import ObsType
 
-import voyager.utils as U
-
-from .minecraft_launcher import MinecraftInstance
-from .process_monitor import SubProcess
+from .async_bridge import AsyncVoyagerEnv
 
 
 class VoyagerEnv(gym.Env):
+    """
+    Blocking wrapper around AsyncVoyagerEnv. The async env runs on an event
+    loop owned by a background thread, so ``abort`` can be called from another
+    thread while ``step`` is waiting, and interrupting a step (e.g. with
+    Ctrl-C) aborts it on the server.
+    """
+
     def __init__(
         self,
         mc_port,
@@ -23,90 +23,82 @@ class VoyagerEnv(gym.Env):
         server_host="http://127.0.0.1",
         max_iteractions=160,
         server_port=3000,
+        username="bot",
         request_timeout=600,
+        timeouts=None,
+        retries=3,
+        pause_in_step=True,
+        pause_server=True,
+        protocol=2,
+        compress=False,
+        reset_timeout=60,
         log_path="./logs",
     ):
-        if not mc_port and not azure_login:
-            raise ValueError("Either mc_port or azure_login must be specified")
-        if mc_port and azure_login:
-            warnings.warn(
-                "Both mc_port and mc_login are specified, mc_port will be ignored"
-            )
-        self.server = f"{server_host}:{server_port}"
-        self.max_iteractions = max_iteractions
-        self.request_timeout = request_timeout
-        self.wait_ticks = wait_ticks
-        self.log_path = log_path
-        self.mineflayer = self.get_mineflayer_process(server_port)
-        if azure_login:
-            self.mc_instance = self.get_mc_instance(azure_login)
-            self.mc_port = self._start_minecraft_server()
-        else:
-            self.mc_instance = None
-            self.mc_port = mc_port
-        self.has_reset = False
-        self.reset_options = None
-        self.connected = False
-        self.server_paused = False
-
-    def get_mineflayer_process(self, server_port: int) -> SubProcess:
-        print("Creating Mineflayer process")
-        U.f_mkdir(self.log_path, "mineflayer")
-        file_path = os.path.abspath(os.path.dirname(__file__))
-        return SubProcess(
-            commands=[
-                "node",
-                U.f_join(file_path, "mineflayer/index.js"),
-                str(server_port),
-            ],
-            name="mineflayer",
-            ready_match=r"Server started on port (\d+)",
-            log_path=U.f_join(self.log_path, "mineflayer"),
+        self.env = AsyncVoyagerEnv(
+            mc_port=mc_port,
+            azure_login=azure_login,
+            wait_ticks=wait_ticks,
+            server_host=server_host,
+            max_iteractions=max_iteractions,
+            server_port=server_port,
+            username=username,
+            request_timeout=request_timeout,
+            timeouts=timeouts,
+            retries=retries,
+            pause_in_step=pause_in_step,
+            pause_server=pause_server,
+            protocol=protocol,
+            compress=compress,
+            reset_timeout=reset_timeout,
+            log_path=log_path,
         )
-
-    def get_mc_instance(self, azure_login: dict) -> MinecraftInstance:
-        print("Creating Minecraft server")
-        U.f_mkdir(self.log_path, "minecraft")
-        return MinecraftInstance(
-            client_id=azure_login["client_id"],
-            redirect_url=azure_login["redirect_url"],
-            secret_value=azure_login["secret_value"],
-            version=azure_login["version"],
-            mineflayer=self.mineflayer,
-            log_path=U.f_join(self.log_path, "minecraft"),
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever,
+            name=f"voyager_env_{self.env.server_port}",
+            daemon=True,
         )
+        self.thread.start()
 
-    def _start_minecraft_server(self) -> int:
-        if not self.mc_instance or self.mc_instance.is_running:
-            raise RuntimeError("Minecraft server is already running")
-        print("Starting Minecraft server")
-        self.mc_instance.run()
-        print(f"Server started on port {self.mc_instance.port}")
-        return self.mc_instance.port
-
-    def _start_mineflayer(self, options: dict) -> list:
-        if not self.mineflayer or self.mineflayer.is_running:
-            raise RuntimeError("Mineflayer process is already running")
-        print("Starting Mineflayer process")
-        started = False
-        for _ in range(3):
-            self.mineflayer.start()
-            if self.mineflayer.is_running:
-                started = True
-                break
-        if not started:
-            raise RuntimeError("Mineflayer process failed to start")
-        print(self.mineflayer.ready_line)
-        res = requests.post(
-            f"{self.server}/start",
-            json=options,
-            timeout=self.request_timeout,
-        )
-        if res.status_code != 200:
-            self.mineflayer.stop()
-            raise RuntimeError(f"Minecraft server reply with code {res.status_code}")
-        last_events = json.loads(res.json())
-        return last_events
+    @property
+    def server_port(self) -> int:
+        return self.env.server_port
+
+    @property
+    def mc_port(self) -> int:
+        return self.env.mc_port
+
+    @property
+    def mineflayer(self):
+        return self.env.mineflayer
+
+    @property
+    def connected(self) -> bool:
+        return self.env.connected
+
+    @property
+    def has_reset(self) -> bool:
+        return self.env.has_reset
+
+    @property
+    def server_paused(self) -> bool:
+        return self.env.server_paused
+
+    @property
+    def reset_time(self) -> float:
+        return self.env.reset_time
+
+    @property
+    def reset_times(self) -> list[float]:
+        return self.env.reset_times
+
+    def _run(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
 
     def reset(
         self,
@@ -115,82 +107,71 @@ class VoyagerEnv(gym.Env):
         equipment: list = [],
         spread: bool = False,
         position=None,
+        time_of_day=None,
     ) -> list:
-        if inventory and mode != "hard":
-            raise RuntimeError("inventory can only be set when mode is hard")
-
-        self.unpause()
-        self.mineflayer.stop()
-        time.sleep(3)  # wait for mineflayer to exit
-
-        options = {
-            "port": self.mc_port,
-            "reset": mode,
-            "inventory": inventory,
-            "equipment": equipment,
-            "spread": spread,
-            "waitTicks": self.wait_ticks,
-            "position": position,
-        }
-        last_events = self._start_mineflayer(options)
-        self.has_reset = True
-        self.connected = True
-        self.pause()
-        return last_events
+        return self._run(
+            self.env.reset(
+                mode=mode,
+                inventory=inventory,
+                equipment=equipment,
+                spread=spread,
+                position=position,
+                time_of_day=time_of_day,
+            )
+        )
+
+    def is_healthy(self) -> bool:
+        return self._run(self.env.is_healthy())
+
+    def register_programs(self, programs: str, programs_id: str = None) -> str:
+        return self._run(self.env.register_programs(programs, programs_id))
+
+    def register_bundle(self, units: str, programs_id: str = None) -> str:
+        return self._run(self.env.register_bundle(units, programs_id))
 
     def step(
         self,
         code: str,
         programs: str = "",
+        programs_id: str = None,
+        dependencies: list[str] = None,
     ) -> dict:
-        if not self.has_reset:
-            raise RuntimeError("Environment has not been reset yet")
-        self.unpause()
-        data = {
-            "code": code,
-            "programs": programs,
-        }
-        res = requests.post(
-            f"{self.server}/step", json=data, timeout=self.request_timeout
-        )
-        if res.status_code != 200:
-            raise RuntimeError("Failed to step Minecraft server")
-        self.pause()
-        returned_data = json.loads(res.json())
-        return returned_data
+        return self._run(self.env.step(code, programs, programs_id, dependencies))
+
+    def step_stream(
+        self,
+        code: str,
+        programs: str = "",
+        programs_id: str = None,
+        dependencies: list[str] = None,
+    ) -> Iterator[list]:
+        """
+        Yields the events of the step as the server emits them, ending with
+        the final observe event. Closing the generator early aborts the step.
+        """
+        events = self.env.step_stream(code, programs, programs_id, dependencies)
+        try:
+            while True:
+                try:
+                    yield self._run(events.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(events.aclose())
+
+    def abort(self) -> None:
+        self._run(self.env.abort())
 
     def close(self) -> None:
-        self.unpause()
-        if self.connected:
-            res = requests.post(f"{self.server}/stop")
-            if res.status_code == 200:
-                self.connected = False
-            else:
-                raise RuntimeError(
-                    f"Failed to stop Minecraft server with code {res.status_code}"
-                )
-        if self.mc_instance:
-            self.mc_instance.stop()
-        self.mineflayer.stop()
+        try:
+            self._run(self.env.close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
 
     def pause(self) -> None:
-        if self.server_paused:
-            return
-        res = requests.post(f"{self.server}/pause")
-        if res.status_code == 200:
-            self.server_paused = True
-        else:
-            raise RuntimeError(
-                f"Failed to pause Minecraft server with code {res.status_code}"
-            )
+        self._run(self.env.pause())
 
     def unpause(self) -> None:
-        if not self.server_paused:
-            return
-        res = requests.post(f"{self.server}/pause")
-        if res.status_code == 200:
-            self.server_paused = False
-        else:
-            raise RuntimeError(
-                f"Failed to unpause Minecraft server with code {res.status_code}"
-            )
+        self._run(self.env.unpause())
@@ -1,4 +1,6 @@
+const crypto = require("crypto");
 const fs = require("fs");
+const zlib = require("zlib");
 const express = require("express");
 const bodyParser = require("body-parser");
 const mineflayer = require("mineflayer");
@@ -17,6 +19,46 @@ const { plugin: tool } = require("mineflayer-tool");
 
 let bot = null;
 
+// programs uploaded through /programs, keyed by their sha256 content hash
+const MAX_REGISTERED_PROGRAMS = 32;
+const registeredPrograms = new Map();
+
+// whether the game is paused by the /pause command of the server mod
+let serverPaused = false;
+
+// aborts the /step currently evaluating code, if any
+let abortStep = null;
+
+// protocol 1 sends the observation JSON string JSON-encoded once more,
+// protocol 2 sends it as the JSON body itself
+const PROTOCOL_VERSION = 2;
+
+function sendEvents(req, res, observation) {
+    if (!(req.body.protocol >= 2)) {
+        res.json(observation);
+        return;
+    }
+    res.setHeader("X-Voyager-Protocol", PROTOCOL_VERSION);
+    res.type("json");
+    if (
+        req.body.compress &&
+        observation.length > 1024 &&
+        req.acceptsEncodings("gzip")
+    ) {
+        res.setHeader("Content-Encoding", "gzip");
+        res.send(zlib.gzipSync(observation));
+    } else {
+        res.send(observation);
+    }
+}
+
+async function setPaused(paused) {
+    if (!bot || serverPaused === paused) return;
+    bot.chat("/pause");
+    serverPaused = paused;
+    await bot.waitForTicks(bot.waitTicks);
+}
+
 const app = express();
 
 app.use(bodyParser.json({ limit: "50mb" }));
@@ -25,11 +67,12 @@ app.use(bodyParser.urlencoded({ limit: "50mb", extended: false }));
 app.post("/start", (req, res) => {
     if (bot) onDisconnect("Restarting bot");
     bot = null;
+    serverPaused = false;
     console.log(req.body);
     bot = mineflayer.createBot({
         host: "localhost", // minecraft server ip
         port: req.body.port, // minecraft server port
-        username: "bot",
+        username: req.body.username || "bot",
         disableChatSigning: true,
         checkTimeoutInterval: 60 * 60 * 1000,
     });
@@ -55,38 +98,10 @@ app.post("/start", (req, res) => {
         if (req.body.reset === "hard") {
             bot.chat("/clear @s");
             bot.chat("/kill @s");
-            const inventory = req.body.inventory ? req.body.inventory : {};
-            const equipment = req.body.equipment
-                ? req.body.equipment
-                : [null, null, null, null, null, null];
-            for (let key in inventory) {
-                bot.chat(`/give @s minecraft:${key} ${inventory[key]}`);
-                itemTicks += 1;
-            }
-            const equipmentNames = [
-                "armor.head",
-                "armor.chest",
-                "armor.legs",
-                "armor.feet",
-                "weapon.mainhand",
-                "weapon.offhand",
-            ];
-            for (let i = 0; i < 6; i++) {
-                if (i === 4) continue;
-                if (equipment[i]) {
-                    bot.chat(
-                        `/item replace entity @s ${equipmentNames[i]} with minecraft:${equipment[i]}`
-                    );
-                    itemTicks += 1;
-                }
-            }
+            itemTicks += giveItems(req.body.inventory, req.body.equipment);
         }
 
-        if (req.body.position) {
-            bot.chat(
-                `/tp @s ${req.body.position.x} ${req.body.position.y} ${req.body.position.z}`
-            );
-        }
+        setPositionAndTime(req.body.position, req.body.time);
 
         // if iron_pickaxe is in bot's inventory
         if (
@@ -127,7 +142,9 @@ app.post("/start", (req, res) => {
         }
 
         await bot.waitForTicks(bot.waitTicks * itemTicks);
-        res.json(bot.observe());
+        const observation = bot.observe();
+        if (req.body.pause) await setPaused(true);
+        sendEvents(req, res, observation);
 
         initCounter(bot);
         bot.chat("/gamerule keepInventory true");
@@ -149,16 +166,136 @@ app.post("/start", (req, res) => {
     }
 });
 
+app.post("/programs", (req, res) => {
+    // either the programs code, or the JSON [key, code] units of a program
+    // bundle, which steps link with their dependencies
+    const units = req.body.units;
+    const programs = units === undefined ? req.body.programs : units;
+    if (typeof programs !== "string") {
+        res.status(400).json({ error: "Missing programs" });
+        return;
+    }
+    const id = crypto.createHash("sha256").update(programs).digest("hex");
+    if (req.body.id && req.body.id !== id) {
+        res.status(400).json({ error: "Programs id does not match content" });
+        return;
+    }
+    let entry = programs;
+    if (units !== undefined) {
+        try {
+            entry = new Map(JSON.parse(units));
+        } catch (err) {
+            res.status(400).json({ error: `Invalid units: ${err.message}` });
+            return;
+        }
+    }
+    registeredPrograms.delete(id);
+    registeredPrograms.set(id, entry);
+    // evict the least recently registered programs
+    while (registeredPrograms.size > MAX_REGISTERED_PROGRAMS) {
+        registeredPrograms.delete(registeredPrograms.keys().next().value);
+    }
+    res.json({ message: "Success", id: id });
+});
+
+function linkPrograms(entry, dependencies) {
+    if (typeof entry === "string") return entry;
+    const keys = dependencies || Array.from(entry.keys());
+    const missing = keys.filter((key) => !entry.has(key));
+    if (missing.length) {
+        throw new Error(`Unknown dependencies ${missing.join(", ")}`);
+    }
+    return keys.map((key) => entry.get(key) + "\n\n").join("");
+}
+
+app.post("/reset", async (req, res) => {
+    if (!bot) {
+        res.status(400).json({ error: "Bot not spawned" });
+        return;
+    }
+    try {
+        if (req.body.pause) await setPaused(false);
+        let itemTicks = 1;
+        // the inventory of the bot is kept unless another one is requested
+        const inventory = req.body.inventory || {};
+        const equipment = req.body.equipment || [];
+        if (Object.keys(inventory).length || equipment.some((item) => item)) {
+            bot.chat("/clear @s");
+            itemTicks += giveItems(inventory, equipment);
+        }
+        setPositionAndTime(req.body.position, req.body.time);
+        bot.globalTickCounter = 0;
+        bot.stuckTickCounter = 0;
+        bot.stuckPosList = [];
+
+        await bot.waitForTicks(bot.waitTicks * itemTicks);
+        const observation = bot.observe();
+        if (req.body.pause) await setPaused(true);
+        sendEvents(req, res, observation);
+    } catch (err) {
+        console.log(err);
+        res.status(500).json({ error: err.message });
+    }
+});
+
 app.post("/step", async (req, res) => {
+    const programs_id = req.body.programs_id;
+    if (programs_id && !registeredPrograms.has(programs_id)) {
+        res.status(404).json({ error: `Unknown programs id ${programs_id}` });
+        return;
+    }
+    let programs;
+    try {
+        programs = programs_id
+            ? linkPrograms(
+                  registeredPrograms.get(programs_id),
+                  req.body.dependencies
+              )
+            : req.body.programs;
+    } catch (err) {
+        res.status(400).json({ error: err.message });
+        return;
+    }
     // import useful package
     let response_sent = false;
+    const stream = req.body.stream;
+    function onObsEvent(event_name, result) {
+        res.write(JSON.stringify([event_name, result]) + "\n");
+    }
+    if (stream) {
+        // newline delimited events, written as soon as they happen
+        res.setHeader("Content-Type", "application/x-ndjson");
+        bot.on("obsEvent", onObsEvent);
+        res.on("close", () => {
+            bot.removeListener("obsEvent", onObsEvent);
+            if (!res.writableFinished && abortStep) abortStep();
+        });
+    }
+    function sendObservation(observation) {
+        if (stream) {
+            bot.removeListener("obsEvent", onObsEvent);
+            res.end();
+        } else {
+            sendEvents(req, res, observation);
+        }
+    }
+    const stepAborted = new Promise((resolve, reject) => {
+        abortStep = () => {
+            stopActions();
+            reject(new Error("Step aborted"));
+        };
+    });
+    // an abort before the evaluation starts must not crash the process
+    stepAborted.catch(() => {});
     function otherError(err) {
         console.log("Uncaught Error");
         bot.emit("error", handleError(err));
-        bot.waitForTicks(bot.waitTicks).then(() => {
+        bot.waitForTicks(bot.waitTicks).then(async () => {
             if (!response_sent) {
                 response_sent = true;
-                res.json(bot.observe());
+                const observation = bot.observe();
+                if (req.body.pause) await setPaused(true);
+                sendObservation(observation);
             }
         });
     }
@@ -233,10 +370,11 @@ app.post("/step", async (req, res) => {
 
     // Retrieve array form post bod
     const code = req.body.code;
-    const programs = req.body.programs;
+    if (req.body.pause) await setPaused(false);
     bot.cumulativeObs = [];
     await bot.waitForTicks(bot.waitTicks);
     const r = await evaluateCode(code, programs);
+    abortStep = null;
     process.off("uncaughtException", otherError);
     if (r !== "success") {
         bot.emit("error", handleError(r));
@@ -246,20 +384,34 @@ app.post("/step", async (req, res) => {
     await bot.waitForTicks(bot.waitTicks);
     if (!response_sent) {
         response_sent = true;
-        res.json(bot.observe());
+        const observation = bot.observe();
+        if (req.body.pause) await setPaused(true);
+        sendObservation(observation);
     }
     bot.removeListener("physicTick", onTick);
 
     async function evaluateCode(code, programs) {
         // Echo the code produced for players to see it. Don't echo when the bot code is already producing dialog or it will double echo
         try {
-            await eval("(async () => {" + programs + "\n" + code + "})()");
+            await Promise.race([
+                eval("(async () => {" + programs + "\n" + code + "})()"),
+                stepAborted,
+            ]);
             return "success";
         } catch (err) {
             return err;
         }
     }
 
+    // the evaluated code cannot be killed, but stopping the bot makes its
+    // pending actions fail quickly
+    function stopActions() {
+        bot.pathfinder.setGoal(null);
+        bot.stopDigging();
+        bot.clearControlStates();
+        if (bot.pvp) bot.pvp.stop();
+    }
+
     function onStuck(posThreshold) {
         const currentPos = bot.entity.position;
         bot.stuckPosList.push(currentPos);
@@ -398,7 +550,60 @@ app.post("/step", async (req, res) => {
     }
 });
 
-app.post("/stop", (req, res) => {
+// returns the number of commands sent, each needs a few ticks to apply
+function giveItems(inventory, equipment) {
+    inventory = inventory ? inventory : {};
+    equipment = equipment ? equipment : [null, null, null, null, null, null];
+    let commands = 0;
+    for (let key in inventory) {
+        bot.chat(`/give @s minecraft:${key} ${inventory[key]}`);
+        commands += 1;
+    }
+    const equipmentNames = [
+        "armor.head",
+        "armor.chest",
+        "armor.legs",
+        "armor.feet",
+        "weapon.mainhand",
+        "weapon.offhand",
+    ];
+    for (let i = 0; i < 6; i++) {
+        if (i === 4) continue;
+        if (equipment[i]) {
+            bot.chat(
+                `/item replace entity @s ${equipmentNames[i]} with minecraft:${equipment[i]}`
+            );
+            commands += 1;
+        }
+    }
+    return commands;
+}
+
+function setPositionAndTime(position, time) {
+    if (position) {
+        bot.chat(`/tp @s ${position.x} ${position.y} ${position.z}`);
+    }
+    if (time) {
+        bot.chat(`/time set ${time}`);
+    }
+}
+
+app.post("/abort", (req, res) => {
+    if (!abortStep) {
+        res.status(400).json({ error: "No step is running" });
+        return;
+    }
+    abortStep();
+    abortStep = null;
+    res.json({ message: "Success" });
+});
+
+app.get("/health", (req, res) => {
+    res.json({ bot: bot !== null, paused: serverPaused });
+});
+
+app.post("/stop", async (req, res) => {
+    if (req.body.pause) await setPaused(false);
     bot.end();
     res.json({
         message: "Bot stopped",
@@ -411,6 +616,7 @@ app.post("/pause", (req, res) => {
         return;
     }
     bot.chat("/pause");
+    serverPaused = !serverPaused;
     bot.waitForTicks(bot.waitTicks).then(() => {
         res.json({ message: "Success" });
     });
@@ -420,6 +626,10 @@ app.post("/pause", (req, res) => {
 
 const DEFAULT_PORT = 3000;
 const PORT = process.argv[2] || DEFAULT_PORT;
-app.listen(PORT, () => {
+const server = app.listen(PORT, () => {
     console.log(`Server started on port ${PORT}`);
 });
+// keep the python bridge connection alive between steps, which can be
+// minutes apart while the LLM agents are thinking
+server.keepAliveTimeout = 15 * 60 * 1000;
+server.headersTimeout = server.keepAliveTimeout + 1000;
@@ -33,6 +33,7 @@ function inject(bot, obs_list) {
             result[obs.name] = obs.observe();
         });
         bot.cumulativeObs.push([event_name, result]);
+        bot.emit("obsEvent", event_name, result);
     };
     bot.observe = function () {
         bot.event("observe");
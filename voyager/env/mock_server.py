@@ -0,0 +1,255 @@
+import hashlib
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def get_observation(position: dict = None, inventory: dict = None) -> dict:
+    return {
+        "voxels": ["grass_block", "dirt", "chest"],
+        "status": {
+            "health": 20,
+            "food": 20,
+            "saturation": 5,
+            "oxygen": 20,
+            "position": position or {"x": -14.5, "y": -60, "z": -4.5},
+            "velocity": {"x": 0, "y": 0, "z": 0},
+            "yaw": 0,
+            "pitch": 0,
+            "onGround": True,
+            "equipment": [None, None, None, None, None, None],
+            "name": "bot",
+            "timeSinceOnGround": 0,
+            "isInWater": False,
+            "isInLava": False,
+            "isInWeb": False,
+            "isCollidedHorizontally": False,
+            "isCollidedVertically": True,
+            "biome": "plains",
+            "entities": {},
+            "timeOfDay": "day",
+            "inventoryUsed": len(inventory or {}),
+            "elapsedTime": 50,
+        },
+        "inventory": inventory or {},
+        "nearbyChests": {"(-14, -60, 2)": {}},
+        "blockRecords": [],
+    }
+
+
+class MockMineflayerHandler(BaseHTTPRequestHandler):
+    """
+    Mimics the endpoints of mineflayer/index.js without a Minecraft server.
+    """
+
+    # keep-alive, like express
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.connection)
+
+    def finish(self):
+        super().finish()
+        self.server.connections.discard(self.connection)
+
+    def _drop(self, endpoint: str) -> bool:
+        # like a kept-alive connection closed by the server as it was reused
+        with self.server.lock:
+            if endpoint not in self.server.drop_requests:
+                return False
+            self.server.drop_requests.remove(endpoint)
+        self.close_connection = True
+        return True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        endpoint = self.path.strip("/")
+        if self._drop(endpoint):
+            return
+        handler = getattr(self, f"_{endpoint}", None)
+        if handler is None:
+            self._send(404, {"error": f"Cannot POST /{endpoint}"})
+            return
+        self.server.requests.append((endpoint, body))
+        self._body = body
+        handler(body)
+
+    def do_GET(self):
+        if self._drop(self.path.strip("/")):
+            return
+        if self.path.strip("/") != "health":
+            self._send(404, {"error": f"Cannot GET {self.path}"})
+            return
+        self._send(200, {"bot": self.server.bot, "paused": self.server.paused})
+
+    def _send(self, status: int, data) -> None:
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_events(self, events: list, stream: bool = False) -> None:
+        if stream:
+            payload = "".join(json.dumps(event) + "\n" for event in events)
+            payload = payload.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        if self._body.get("protocol", 1) >= 2:
+            payload = json.dumps(events).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("X-Voyager-Protocol", "2")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        # protocol 1 sends the JSON string returned by bot.observe()
+        self._send(200, json.dumps(events))
+
+    def _start(self, body):
+        self.server.bot = True
+        self.server.paused = bool(body.get("pause"))
+        if body.get("reset") == "hard":
+            self.server.inventory = dict(body.get("inventory") or {})
+        observation = get_observation(body.get("position"), self.server.inventory)
+        self._send_events([["observe", observation]])
+
+    def _reset(self, body):
+        if not self.server.bot:
+            self._send(400, {"error": "Bot not spawned"})
+            return
+        self.server.paused = bool(body.get("pause"))
+        if body.get("inventory") or any(body.get("equipment") or []):
+            self.server.inventory = dict(body.get("inventory") or {})
+        observation = get_observation(body.get("position"), self.server.inventory)
+        self._send_events([["observe", observation]])
+
+    def _programs(self, body):
+        programs = body.get("units", body.get("programs"))
+        if not isinstance(programs, str):
+            self._send(400, {"error": "Missing programs"})
+            return
+        programs_id = hashlib.sha256(programs.encode("utf-8")).hexdigest()
+        if body.get("id") and body["id"] != programs_id:
+            self._send(400, {"error": "Programs id does not match content"})
+            return
+        if "units" in body:
+            programs = dict(json.loads(programs))
+        self.server.programs[programs_id] = programs
+        self._send(200, {"message": "Success", "id": programs_id})
+
+    def _step(self, body):
+        programs_id = body.get("programs_id")
+        if programs_id and programs_id not in self.server.programs:
+            self._send(404, {"error": f"Unknown programs id {programs_id}"})
+            return
+        units = self.server.programs.get(programs_id)
+        missing = [
+            key
+            for key in body.get("dependencies") or []
+            if not isinstance(units, dict) or key not in units
+        ]
+        if missing:
+            self._send(400, {"error": f"Unknown dependencies {', '.join(missing)}"})
+            return
+        if body.get("pause"):
+            self.server.paused = True
+        self._send_events(
+            list(self.server.step_events)
+            + [["observe", get_observation(inventory=self.server.inventory)]],
+            stream=bool(body.get("stream")),
+        )
+
+    def _abort(self, body):
+        self._send(400, {"error": "No step is running"})
+
+    def _pause(self, body):
+        if not self.server.bot:
+            self._send(400, {"error": "Bot not spawned"})
+            return
+        self.server.paused = not self.server.paused
+        self._send(200, {"message": "Success"})
+
+    def _stop(self, body):
+        self.server.bot = False
+        if body.get("pause"):
+            self.server.paused = False
+        self._send(200, {"message": "Bot stopped"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockMineflayerServer(ThreadingHTTPServer):
+    def __init__(self, port: int = 0, step_events: list = None):
+        super().__init__(("127.0.0.1", port), MockMineflayerHandler)
+        self.step_events = step_events or []
+        self.requests = []
+        self.programs = {}
+        self.connections = set()
+        # endpoints whose next request closes its connection without a response
+        self.drop_requests = []
+        self.lock = threading.Lock()
+        self.bot = False
+        self.paused = False
+        self.inventory = {}
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        # like a killed process, drop the keep-alive connections
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class MockMineflayerProcess:
+    """
+    Stands in for the SubProcess running mineflayer/index.js: starting it
+    serves a new MockMineflayerServer on ``port``, so hard resets lose the
+    registered programs like a restarted Node process does.
+    """
+
+    def __init__(self, port: int, step_events: list = None):
+        self.port = port
+        self.step_events = step_events
+        self.server = None
+        self.requests = []
+        self.ready_line = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.server is not None
+
+    def start(self, timeout: float = None) -> bool:
+        self.server = MockMineflayerServer(self.port, self.step_events)
+        # kept across restarts
+        self.server.requests = self.requests
+        self.server.start()
+        self.ready_line = f"Server started on port {self.port}"
+        return True
+
+    def stop(self, timeout: float = None) -> None:
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
@@ -0,0 +1,107 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import voyager.utils as U
+
+from .bridge import VoyagerEnv
+
+
+class VoyagerEnvPool:
+    """
+    Runs ``size`` Mineflayer bots on consecutive server ports, all connected
+    to the same Minecraft server, and hands them out to concurrent learners.
+    The server has a single pause state, so the bots never pause it.
+    """
+
+    def __init__(
+        self,
+        mc_port: int,
+        size: int,
+        base_server_port: int = 3000,
+        reset_options: dict = None,
+        log_path: str = "./logs",
+        **env_kwargs,
+    ):
+        self.mc_port = mc_port
+        self.size = size
+        self.server_ports = [base_server_port + i for i in range(size)]
+        self.reset_options = reset_options or {}
+        self.log_path = log_path
+        self.env_kwargs = env_kwargs
+        self.replacements = 0
+        self.envs = {}
+        self._idle = queue.Queue()
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            envs = executor.map(self._create_env, self.server_ports)
+            for server_port, env in zip(self.server_ports, envs):
+                self.envs[server_port] = env
+                self._idle.put(server_port)
+
+    def _create_env(self, server_port: int) -> VoyagerEnv:
+        env = VoyagerEnv(
+            mc_port=self.mc_port,
+            azure_login=None,
+            server_port=server_port,
+            username=f"bot{server_port}",
+            log_path=U.f_join(self.log_path, f"bot{server_port}"),
+            **{**self.env_kwargs, "pause_in_step": False, "pause_server": False},
+        )
+        env.reset(mode="hard", **self.reset_options)
+        return env
+
+    def _replace(self, server_port: int) -> VoyagerEnv:
+        print(f"\033[31mReplacing crashed Mineflayer worker on {server_port}\033[0m")
+        try:
+            self.envs[server_port].close()
+        except Exception as e:
+            print(e)
+            self.envs[server_port].mineflayer.stop()
+        self.envs[server_port] = self._create_env(server_port)
+        self.replacements += 1
+        return self.envs[server_port]
+
+    def acquire(self, timeout: float = None) -> VoyagerEnv:
+        server_port = self._idle.get(timeout=timeout)
+        try:
+            env = self.envs[server_port]
+            if not env.is_healthy():
+                env = self._replace(server_port)
+        except Exception:
+            self._idle.put(server_port)
+            raise
+        return env
+
+    def release(self, env: VoyagerEnv) -> None:
+        self._idle.put(env.server_port)
+
+    @contextmanager
+    def env(self, timeout: float = None):
+        env = self.acquire(timeout=timeout)
+        try:
+            yield env
+        finally:
+            self.release(env)
+
+    def check_health(self) -> dict[int, bool]:
+        """
+        Replaces the crashed idle workers.
+        Returns: the health of every idle worker before the check
+        """
+        health = {}
+        for _ in range(self._idle.qsize()):
+            try:
+                server_port = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                health[server_port] = self.envs[server_port].is_healthy()
+                if not health[server_port]:
+                    self._replace(server_port)
+            finally:
+                self._idle.put(server_port)
+        return health
+
+    def close(self) -> None:
+        for env in self.envs.values():
+            env.close()
@@ -49,19 +49,25 @@ class SubProcess:
         logger.setLevel(logging.INFO)
         return logger
 
-    def start(self) -> None:
+    def start(self, timeout: float = None) -> bool:
         self.logger.info(f"**STARTING SUBPROCESS**\nCommands: {self.commands}")
         self.ready_event = threading.Event()
         self.ready_line = ""
         self.thread = threading.Thread(target=self._start_thread_fun)
         self.thread.start()
-        self.ready_event.wait()
+        self.ready_event.wait(timeout)
+        return self.is_ready
 
-    def stop(self) -> None:
+    def stop(self, timeout: float = None) -> None:
         self.logger.info("**STOPPING SUBPROCESS**")
         if self.process and self.process.is_running():
             self.process.terminate()
-            self.process.wait()
+            try:
+                self.process.wait(timeout)
+            except psutil.TimeoutExpired:
+                self.logger.info("Subprocess did not terminate, killing it.")
+                self.process.kill()
+                self.process.wait(timeout)
 
     def _start_thread_fun(self) -> None:
         self.process = psutil.Popen(
@@ -85,6 +91,10 @@ class SubProcess:
         if self.finished_callback:
             self.finished_callback()
 
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_line != "" and self.is_running
+
     @property
     def is_running(self):
         if self.process is None:
@@ -0,0 +1,155 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import aiohttp
+
+# sent again when the server closed the kept-alive connection they reused,
+# running them twice has the effect of running them once
+IDEMPOTENT_ENDPOINTS = {"health", "pause", "programs"}
+
+
+@dataclass
+class BridgeResponse:
+
+    status_code: int
+    headers: dict
+    text: str
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class BridgeSession:
+    def __init__(
+        self,
+        server: str,
+        request_timeout: int = 600,
+        timeouts: dict = None,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_maxsize: int = 4,
+        # below the 15 minutes of index.js, so the client drops an idle
+        # connection before the server closes it
+        keepalive_timeout: int = 14 * 60,
+    ):
+        self.server = server
+        self.request_timeout = request_timeout
+        self.timeouts = {
+            "start": request_timeout,
+            "reset": request_timeout,
+            "step": request_timeout,
+            "programs": request_timeout,
+            "abort": 60,
+            "health": 10,
+            "pause": 60,
+            "stop": 60,
+        }
+        self.timeouts.update(timeouts or {})
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self.requests = {}
+        self.connections = 0
+        self.reused = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # the session binds to the running loop, so it is created lazily
+        if self.session is None or self.session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_maxsize, keepalive_timeout=self.keepalive_timeout
+                ),
+                trace_configs=[trace_config],
+            )
+        return self.session
+
+    async def _on_connection_create(self, session, context, params) -> None:
+        self.connections += 1
+
+    async def _on_connection_reuse(self, session, context, params) -> None:
+        self.reused += 1
+
+    async def _send(
+        self, method: str, endpoint: str, timeout: aiohttp.ClientTimeout, **kwargs
+    ) -> aiohttp.ClientResponse:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        backoff = self.backoff_factor
+        attempt = 0
+        disconnected = False
+        while True:
+            try:
+                return await self._get_session().request(
+                    method, f"{self.server}/{endpoint}", timeout=timeout, **kwargs
+                )
+            except aiohttp.ClientConnectorError:
+                # only failed connections are retried: a request that reached
+                # the server may already have run code on the bot
+                if attempt == self.retries:
+                    raise
+                attempt += 1
+                await asyncio.sleep(backoff)
+                backoff *= 2
+            except aiohttp.ServerDisconnectedError:
+                # a kept-alive connection closed by the server as it was reused
+                if disconnected or endpoint not in IDEMPOTENT_ENDPOINTS:
+                    raise
+                disconnected = True
+
+    async def request(self, method: str, endpoint: str, **kwargs) -> BridgeResponse:
+        timeout = kwargs.pop(
+            "timeout", self.timeouts.get(endpoint, self.request_timeout)
+        )
+        res = await self._send(
+            method, endpoint, aiohttp.ClientTimeout(total=timeout), **kwargs
+        )
+        async with res:
+            return BridgeResponse(res.status, res.headers, await res.text())
+
+    async def post(self, endpoint: str, **kwargs) -> BridgeResponse:
+        return await self.request("POST", endpoint, **kwargs)
+
+    async def get(self, endpoint: str, **kwargs) -> BridgeResponse:
+        return await self.request("GET", endpoint, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, endpoint: str, **kwargs):
+        """
+        Posts to ``endpoint`` and yields the unread response. The timeout
+        applies to every read instead of the whole response.
+        """
+        timeout = kwargs.pop(
+            "timeout", self.timeouts.get(endpoint, self.request_timeout)
+        )
+        res = await self._send(
+            "POST",
+            endpoint,
+            aiohttp.ClientTimeout(total=None, sock_read=timeout),
+            **kwargs,
+        )
+        try:
+            yield res
+        finally:
+            if res.content.at_eof():
+                res.release()
+            else:
+                # dropping the connection tells the server to abort
+                res.close()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "requests": dict(self.requests),
+            "connections": self.connections,
+            "reused": self.reused,
+        }
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
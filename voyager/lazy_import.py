@@ -0,0 +1,23 @@
+import importlib
+
+
+def lazy_exports(package: str, exports: dict[str, str]):
+    """
+    Returns: module level ``__getattr__`` and ``__dir__`` for ``package``,
+      importing each name of ``exports`` from its submodule on first access,
+      so importing the package does not import its heavy dependencies
+    """
+
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        module = importlib.import_module(exports[name], package)
+        value = getattr(module, name)
+        # later lookups find it without calling __getattr__
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
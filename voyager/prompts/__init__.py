@@ -1,9 +1,5 @@
-import pkg_resources
-
-import voyager.utils as U
+from .registry import PromptRegistry, get_prompt_registry, set_prompt_registry
 
 
 def load_prompt(prompt) -> str:
-    package_path = pkg_resources.resource_filename("voyager", "")
-    prompt = U.load_text(f"{package_path}/prompts/{prompt}.txt")
-    return str(prompt)
+    return get_prompt_registry().prompt(prompt)
@@ -0,0 +1,121 @@
+import os
+import threading
+from importlib import resources
+from typing import Optional
+
+from langchain.prompts import SystemMessagePromptTemplate
+
+import voyager.utils as U
+from voyager.resources import SOURCES, load_resources
+
+
+class PromptRegistry:
+    """
+    Prompts and control primitives of the voyager package, from the
+    process-wide resource cache, with templates compiled on first use. With
+    ``reload`` they are read from the files under ``package_path`` instead,
+    which are stat'ed on each access and reloaded when their mtime changes, to
+    edit prompts during a run.
+    """
+
+    def __init__(self, package_path: str = None, reload: bool = False):
+        self.package_path = package_path or str(resources.files("voyager"))
+        self.reload = reload
+        self._lock = threading.Lock()
+        # (source, name) -> (mtime, text), with a None mtime when cached
+        self._texts = {}
+        # derived from the texts, recomputed when their mtime changes
+        self._templates = {}
+        self._token_counts = {}
+        self._encoding = None
+        for source in SOURCES:
+            if reload:
+                for name in self.names(source):
+                    self._load(source, name)
+            else:
+                for name, text in load_resources()[source].items():
+                    self._texts[source, name] = (None, text)
+
+    def _path(self, source: str, name: str) -> str:
+        return f"{self.package_path}/{source}/{name}{SOURCES[source]}"
+
+    def names(self, source: str) -> list[str]:
+        if not self.reload:
+            return list(load_resources()[source])
+        extension = SOURCES[source]
+        return sorted(
+            file[: -len(extension)]
+            for file in os.listdir(f"{self.package_path}/{source}")
+            if file.endswith(extension)
+        )
+
+    def _load(self, source: str, name: str) -> tuple[float, str]:
+        path = self._path(source, name)
+        entry = (os.path.getmtime(path), str(U.load_text(path)))
+        self._texts[source, name] = entry
+        return entry
+
+    def _get(self, source: str, name: str) -> tuple[float, str]:
+        with self._lock:
+            entry = self._texts.get((source, name))
+            if entry is None:
+                return self._load(source, name)
+            if self.reload and os.path.getmtime(self._path(source, name)) != entry[0]:
+                print(f"\033[33mReloading {source}/{name}\033[0m")
+                return self._load(source, name)
+            return entry
+
+    def prompt(self, name: str) -> str:
+        return self._get("prompts", name)[1]
+
+    def primitives(
+        self, names: list[str] = None, source: str = "control_primitives_context"
+    ) -> list[str]:
+        if names is None:
+            names = self.names(source)
+        return [self._get(source, name)[1] for name in names]
+
+    def template(self, name: str) -> SystemMessagePromptTemplate:
+        mtime, text = self._get("prompts", name)
+        cached = self._templates.get(name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, SystemMessagePromptTemplate.from_template(text))
+            self._templates[name] = cached
+        return cached[1]
+
+    def token_count(self, source: str, name: str) -> int:
+        mtime, text = self._get(source, name)
+        cached = self._token_counts.get((source, name))
+        if cached is None or cached[0] != mtime:
+            if self._encoding is None:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            cached = (mtime, len(self._encoding.encode(text)))
+            self._token_counts[source, name] = cached
+        return cached[1]
+
+    def token_counts(self) -> dict[str, int]:
+        """
+        Returns: "<source>/<name>" -> number of cl100k_base tokens
+        """
+        return {
+            f"{source}/{name}": self.token_count(source, name)
+            for source in SOURCES
+            for name in self.names(source)
+        }
+
+
+_prompt_registry: Optional[PromptRegistry] = None
+
+
+def set_prompt_registry(registry: Optional[PromptRegistry]) -> None:
+    global _prompt_registry
+    _prompt_registry = registry
+
+
+def get_prompt_registry() -> PromptRegistry:
+    global _prompt_registry
+    if _prompt_registry is None:
+        _prompt_registry = PromptRegistry()
+    return _prompt_registry
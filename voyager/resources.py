@@ -0,0 +1,89 @@
+"""
+Texts of the prompts and control primitives shipped in the voyager package,
+read once per process through importlib.resources.
+
+    python -m voyager.resources <dir>
+
+writes them to ``<dir>/voyager/resources.json.gz``, which setup.py does when
+building the package, so an installed package loads them from one file. Do
+not write it into a checkout: edits of the prompts would be ignored.
+"""
+
+import argparse
+import gzip
+import json
+import os
+from importlib import resources
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+# directory under the voyager package -> extension of its entries
+SOURCES = {
+    "prompts": ".txt",
+    "control_primitives": ".js",
+    "control_primitives_context": ".js",
+}
+ARCHIVE = "resources.json.gz"
+
+_resources: Optional[Mapping[str, Mapping[str, str]]] = None
+
+
+def read_resources() -> dict[str, dict[str, str]]:
+    """
+    Returns: source -> name -> text, read from the package files
+    """
+    package = resources.files("voyager")
+    texts = {}
+    for source, extension in SOURCES.items():
+        texts[source] = {
+            entry.name[: -len(extension)]: entry.read_text(encoding="utf-8")
+            for entry in sorted(
+                package.joinpath(source).iterdir(), key=lambda entry: entry.name
+            )
+            if entry.name.endswith(extension)
+        }
+    return texts
+
+
+def load_resources() -> Mapping[str, Mapping[str, str]]:
+    """
+    Returns: the read-only source -> name -> text of the package, from the
+      archive built at install time if any, else from the package files
+    """
+    global _resources
+    if _resources is None:
+        archive = resources.files("voyager").joinpath(ARCHIVE)
+        if archive.is_file():
+            texts = json.loads(gzip.decompress(archive.read_bytes()))
+        else:
+            texts = read_resources()
+        _resources = MappingProxyType(
+            {source: MappingProxyType(texts[source]) for source in SOURCES}
+        )
+    return _resources
+
+
+def load_texts(source: str, names: list[str] = None) -> list[str]:
+    """
+    Returns: the texts of ``names`` in ``source``, all of them by default
+    """
+    texts = load_resources()[source]
+    if names is None:
+        return list(texts.values())
+    return [texts[name] for name in names]
+
+
+def build_archive(build_dir: str) -> str:
+    path = os.path.join(build_dir, "voyager", ARCHIVE)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(read_resources(), f, separators=(",", ":"))
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Archive the prompts and control primitives of voyager"
+    )
+    parser.add_argument("build_dir", help="directory containing the voyager package")
+    args = parser.parse_args()
+    print(f"\033[32mWrote {build_archive(args.build_dir)}\033[0m")
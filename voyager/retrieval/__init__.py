@@ -0,0 +1,33 @@
+from typing import TYPE_CHECKING
+
+from voyager.lazy_import import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "Embedder": ".embedders",
+        "HashingEmbedder": ".embedders",
+        "OpenAIEmbedder": ".embedders",
+        "SentenceTransformerEmbedder": ".embedders",
+        "get_embedder": ".embedders",
+        "SkillRetriever": ".skill_retriever",
+    },
+)
+__all__ = [
+    "Embedder",
+    "HashingEmbedder",
+    "OpenAIEmbedder",
+    "SentenceTransformerEmbedder",
+    "get_embedder",
+    "SkillRetriever",
+]
+
+if TYPE_CHECKING:
+    from .embedders import (
+        Embedder,
+        HashingEmbedder,
+        OpenAIEmbedder,
+        SentenceTransformerEmbedder,
+        get_embedder,
+    )
+    from .skill_retriever import SkillRetriever
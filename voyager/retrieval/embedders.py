@@ -0,0 +1,101 @@
+import re
+import zlib
+from typing import Protocol
+
+import numpy as np
+
+
+class Embedder(Protocol):
+
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        Returns: a float32 matrix with one L2-normalized row per text
+        """
+        ...
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder: camelCase and snake_case names are
+    split into words and every word is hashed into one of ``dim`` buckets.
+    It needs no model and embeds thousands of descriptions in milliseconds.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.name = f"hashing-{dim}"
+        self.dim = dim
+
+    def _tokenize(self, text: str) -> list[str]:
+        text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+        words = re.findall(r"[a-z]+", text.lower())
+        # crude singular form so "logs" matches "log"
+        return [
+            word[:-1] if len(word) > 3 and word.endswith("s") else word
+            for word in words
+        ]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in self._tokenize(text):
+                bucket = zlib.crc32(word.encode("utf-8"))
+                sign = 1 if bucket & 0x80000000 else -1
+                matrix[row, bucket % self.dim] += sign
+        return _normalize(matrix)
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model: str = "all-MiniLM-L6-v2", batch_size: int = 64):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "SentenceTransformerEmbedder requires `pip install sentence-transformers`"
+            ) from e
+        self.model = SentenceTransformer(model)
+        self.name = f"sentence-transformers/{model}"
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        matrix = self.model.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True
+        )
+        return _normalize(matrix.reshape(len(texts), self.dim))
+
+
+class OpenAIEmbedder:
+    """
+    The model the shipped Chroma vector DBs were built with, so their stored
+    embeddings can be queried without embedding the documents again.
+    """
+
+    def __init__(self, model: str = "text-embedding-ada-002"):
+        from langchain_openai import OpenAIEmbeddings
+
+        self.model = OpenAIEmbeddings(model=model)
+        self.name = model
+        self.dim = 1536
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return _normalize(np.array(self.model.embed_documents(texts)))
+
+
+def get_embedder(type: str) -> Embedder:
+    assert type in ["hashing", "sentence-transformers", "openai"], "Invalid embedder"
+    if type == "hashing":
+        embedder = HashingEmbedder()
+    elif type == "sentence-transformers":
+        embedder = SentenceTransformerEmbedder()
+    else:
+        embedder = OpenAIEmbedder()
+    return embedder
@@ -0,0 +1,144 @@
+"""
+Builds the embedding index of a skill library.
+
+    python -m voyager.retrieval.index_builder skill_library/trial1/skill [--embedder hashing]
+
+The index is written next to the library, in ``embeddings/``: a float32
+matrix in ``embeddings.npy`` and ``index.json`` with the name and source hash
+of every row. Skills whose code and description did not change keep their
+row, so only new or edited skills are embedded again.
+"""
+
+import argparse
+import re
+
+import numpy as np
+
+import voyager.utils as U
+from voyager.classes import content_hash
+
+from .embedders import Embedder, get_embedder
+
+INDEX_DIR = "embeddings"
+
+
+def _parse_description(text: str) -> str:
+    # descriptions are stored as a function stub with a single comment
+    comments = re.findall(r"^\s*//\s?(.*)$", text, re.MULTILINE)
+    return " ".join(comments) if comments else text.strip()
+
+
+def load_skill_sources(skill_dir: str) -> dict[str, dict]:
+    """
+    Returns: name -> {"code", "description"} for every skill in ``code/`` and
+    ``skills.json``, so skills added by SkillDescriptor are indexed too
+    """
+    skills = {}
+    skills_path = U.f_join(skill_dir, "skills.json")
+    if U.f_exists(skills_path):
+        for name, skill in U.load_json(skills_path).items():
+            skills[name] = {
+                "code": skill["code"],
+                "description": _parse_description(skill.get("description", "")),
+            }
+    for path in sorted(U.f_glob(U.f_join(skill_dir, "code", "*.js"))):
+        name = U.last_part_in_path(path)[: -len(".js")]
+        skills.setdefault(name, {"description": ""})["code"] = U.load_text(path)
+        description_path = U.f_join(skill_dir, "description", f"{name}.txt")
+        if U.f_exists(description_path):
+            skills[name]["description"] = _parse_description(
+                U.load_text(description_path)
+            )
+    for name, skill in skills.items():
+        # without a description the name is the best summary of the skill
+        if not skill["description"]:
+            skill["description"] = name
+    return skills
+
+
+def load_index(skill_dir: str, mmap_mode: str = "r") -> tuple[dict, np.ndarray]:
+    index = U.load_json(U.f_join(skill_dir, INDEX_DIR, "index.json"))
+    embeddings = np.load(
+        U.f_join(skill_dir, INDEX_DIR, "embeddings.npy"), mmap_mode=mmap_mode
+    )
+    return index, embeddings
+
+
+def build_index(
+    skill_dir: str, embedder: Embedder, batch_size: int = 256, rebuild: bool = False
+) -> dict:
+    """
+    Returns: the number of skills ``embedded`` again and ``reused`` from the
+    previous index
+    """
+    skills = load_skill_sources(skill_dir)
+    names = sorted(skills)
+    hashes = [
+        content_hash(skills[name]["code"] + "\n" + skills[name]["description"])
+        for name in names
+    ]
+
+    previous = {}
+    if not rebuild and U.f_exists(skill_dir, INDEX_DIR, "index.json"):
+        index, old_embeddings = load_index(skill_dir)
+        if index["embedder"] == embedder.name and index["dim"] == embedder.dim:
+            previous = {
+                (skill["name"], skill["hash"]): old_embeddings[row]
+                for row, skill in enumerate(index["skills"])
+            }
+
+    embeddings = np.zeros((len(names), embedder.dim), dtype=np.float32)
+    stale = []
+    for row, (name, source_hash) in enumerate(zip(names, hashes)):
+        if (name, source_hash) in previous:
+            embeddings[row] = previous[(name, source_hash)]
+        else:
+            stale.append(row)
+    for start in range(0, len(stale), batch_size):
+        rows = stale[start : start + batch_size]
+        embeddings[rows] = embedder.embed(
+            [skills[names[row]]["description"] for row in rows]
+        )
+
+    U.f_mkdir(skill_dir, INDEX_DIR)
+    # the old matrix may still be memory-mapped, so the new one replaces it
+    tmp_path = U.f_join(skill_dir, INDEX_DIR, "embeddings.tmp.npy")
+    np.save(tmp_path, embeddings)
+    U.f_move(tmp_path, U.f_join(skill_dir, INDEX_DIR, "embeddings.npy"))
+    U.dump_json(
+        {
+            "embedder": embedder.name,
+            "dim": embedder.dim,
+            "skills": [
+                {
+                    "name": name,
+                    "hash": source_hash,
+                    "description": skills[name]["description"],
+                }
+                for name, source_hash in zip(names, hashes)
+            ],
+        },
+        U.f_join(skill_dir, INDEX_DIR, "index.json"),
+        indent=4,
+    )
+    return {"embedded": len(stale), "reused": len(names) - len(stale)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build skill library embeddings")
+    parser.add_argument("skill_dirs", nargs="+", help="e.g. skill_library/trial1/skill")
+    parser.add_argument("--embedder", default="hashing")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    embedder = get_embedder(args.embedder)
+    for skill_dir in args.skill_dirs:
+        counts = build_index(skill_dir, embedder, args.batch_size, args.rebuild)
+        print(
+            f"\033[32m{skill_dir}: embedded {counts['embedded']}, reused {counts['reused']}\033[0m"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import numpy as np
+
+import voyager.utils as U
+
+from .embedders import Embedder
+
+# the shipped vector DBs were written by Chroma with OpenAI embeddings
+CHROMA_EMBEDDER = "text-embedding-ada-002"
+
+
+class SkillRetriever:
+    """
+    Ranks skills by the cosine similarity between their description and a
+    query. Every row of the matrix is normalized, so ranking all skills is a
+    single matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        names: list[str] = None,
+        documents: list[str] = None,
+        embeddings: np.ndarray = None,
+        code: dict[str, str] = None,
+    ):
+        self.embedder = embedder
+        self.names = list(names or [])
+        self.documents = list(documents or [])
+        self.code = dict(code or {})
+        self._rows = {name: row for row, name in enumerate(self.names)}
+        if self.names and embeddings is None:
+            embeddings = embedder.embed(self.documents)
+        # the loaded rows are used as they are, which keeps a memory-mapped
+        # index on disk, and the skills added later go to a growable buffer
+        self._matrix = (
+            embeddings if self.names else np.zeros((0, embedder.dim), dtype=np.float32)
+        )
+        self._added = np.zeros((16, embedder.dim), dtype=np.float32)
+
+    @classmethod
+    def from_chroma(cls, skill_dir: str, embedder: Embedder) -> "SkillRetriever":
+        """
+        Loads a skill library such as ``skill_library/trial1/skill``. The
+        stored embeddings are reused when ``embedder`` is the model that wrote
+        them, otherwise the stored documents are embedded again.
+        """
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(
+            U.f_join(skill_dir, "vectordb", "chroma-embeddings.parquet"),
+            columns=["id", "document", "embedding"],
+            memory_map=True,
+        )
+        names = table.column("id").to_pylist()
+        documents = table.column("document").to_pylist()
+        embeddings = None
+        if embedder.name == CHROMA_EMBEDDER and table.num_rows:
+            values = table.column("embedding").combine_chunks().flatten()
+            embeddings = values.to_numpy().reshape(table.num_rows, -1)
+            embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        code = {}
+        skills_path = U.f_join(skill_dir, "skills.json")
+        if U.f_exists(skills_path):
+            code = {
+                name: skill["code"] for name, skill in U.load_json(skills_path).items()
+            }
+        return cls(embedder, names, documents, embeddings, code)
+
+    @classmethod
+    def from_index(cls, skill_dir: str, embedder: Embedder) -> "SkillRetriever":
+        """
+        Loads the index written by ``index_builder`` for the same embedder.
+        """
+        from .index_builder import load_index, load_skill_sources
+
+        # copy-on-write, so replacing a skill does not write to the index
+        index, embeddings = load_index(skill_dir, mmap_mode="c")
+        if index["embedder"] != embedder.name:
+            raise ValueError(
+                f"Index of {skill_dir} was built with {index['embedder']}, not {embedder.name}"
+            )
+        skills = load_skill_sources(skill_dir)
+        return cls(
+            embedder,
+            [skill["name"] for skill in index["skills"]],
+            [skill["description"] for skill in index["skills"]],
+            embeddings,
+            {name: skill["code"] for name, skill in skills.items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def _add(self, names: list[str], documents: list[str], embeddings) -> None:
+        for name, document, embedding in zip(names, documents, embeddings):
+            if name in self._rows:
+                row = self._rows[name]
+                self.documents[row] = document
+            else:
+                row = len(self.names)
+                self._rows[name] = row
+                self.names.append(name)
+                self.documents.append(document)
+            if row < len(self._matrix):
+                if not self._matrix.flags.writeable:
+                    self._matrix = np.array(self._matrix)
+                self._matrix[row] = embedding
+                continue
+            row -= len(self._matrix)
+            if row == len(self._added):
+                self._added = np.concatenate([self._added, np.zeros_like(self._added)])
+            self._added[row] = embedding
+
+    def add_skill(self, name: str, document: str, code: str = None) -> None:
+        self.add_skills([name], [document], None if code is None else {name: code})
+
+    def add_skills(
+        self, names: list[str], documents: list[str], code: dict[str, str] = None
+    ) -> None:
+        """
+        Adds or replaces the skills ``names``, embedding their documents in
+        one batch.
+        """
+        if not names:
+            return
+        self._add(names, documents, self.embedder.embed(documents))
+        if code:
+            self.code.update(code)
+
+    def retrieve(self, query: str, k: int = 5) -> list[str]:
+        """
+        Returns: the names of the ``k`` skills most similar to ``query``, best first
+        """
+        if not self.names or k <= 0:
+            return []
+        query = self.embedder.embed([query])[0]
+        scores = self._matrix @ query
+        added = len(self.names) - len(self._matrix)
+        if added:
+            scores = np.concatenate([scores, self._added[:added] @ query])
+        if k < len(scores):
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.names[i] for i in top]
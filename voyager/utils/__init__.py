@@ -1,3 +1,4 @@
 from .file_utils import *
 from .json_utils import *
+from .js_utils import *
 from .record_utils import EventRecorder
@@ -0,0 +1,19 @@
+// Summarizes the top level function declarations of a program in one call,
+// so Python does not walk the Babel AST node by node over the bridge.
+// Babel is passed in because it is installed next to the bridge, not here.
+function extractFunctions(babel, generator, code) {
+    const parsed = babel.parse(code);
+    const functions = parsed.program.body
+        .filter((node) => node.type === "FunctionDeclaration")
+        .map((node) => ({
+            name: node.id.name,
+            type: node.async ? "AsyncFunctionDeclaration" : "FunctionDeclaration",
+            body: generator(node).code,
+            params: node.params.map((param) =>
+                param.type === "Identifier" ? param.name : null
+            ),
+        }));
+    return JSON.stringify(functions);
+}
+
+module.exports = { extractFunctions };
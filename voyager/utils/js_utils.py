@@ -0,0 +1,119 @@
+"""
+Helpers to inspect javascript programs. The regex helpers and the esprima
+parser run in-process, Babel is reached through the node bridge for syntax
+esprima does not support.
+"""
+
+import json
+import os
+import re
+
+# skills are joined from the declarations extract_code sliced (esprima) or
+# generated (Babel), and the control primitives are formatted by prettier, so
+# every top level function declaration starts at the beginning of a line. An
+# unindented nested declaration is reported too, which only adds a name.
+_TOP_LEVEL_FUNCTION = re.compile(
+    r"^(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)", re.MULTILINE
+)
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+# bare calls, i.e. not ``obj.method(`` nor ``new Class(``
+_CALL = re.compile(r"(?<![\w$.])(?<!new )([A-Za-z_$][\w$]*)\s*\(")
+_DECLARATION = re.compile(r"\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)")
+_JS_KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return"}
+_JS_GLOBAL_FUNCTIONS = {
+    "clearInterval",
+    "clearTimeout",
+    "isFinite",
+    "isNaN",
+    "parseFloat",
+    "parseInt",
+    "require",
+    "setInterval",
+    "setTimeout",
+}
+# Babel and the helper summarizing its AST, required once per process
+_babel_extractor = None
+
+
+def js_function_names(code: str) -> list[str]:
+    """
+    Returns: names of the top level function declarations in ``code``
+    """
+    return _TOP_LEVEL_FUNCTION.findall(code)
+
+
+def js_identifiers(code: str) -> set[str]:
+    """
+    Returns: every identifier-like token in ``code``.
+      Tokens inside strings and comments are included as well, which can only
+      over-approximate the set of referenced functions.
+    """
+    return set(_IDENTIFIER.findall(code))
+
+
+def js_function_declarations(code: str) -> list[dict]:
+    """
+    Parses ``code`` in-process with esprima, which supports up to ES2017.
+    Returns: the top level function declarations, each with its ``name``,
+      ``type`` (``AsyncFunctionDeclaration`` or ``FunctionDeclaration``), source
+      ``body`` and ``params`` names (None for destructured parameters)
+    Raises: ImportError without esprima, esprima.Error on unsupported syntax
+    """
+    try:
+        # half a second to import, so only when parsing
+        import esprima
+    except ImportError:
+        raise ImportError("js_function_declarations requires `pip install esprima`")
+    program = esprima.parseScript(code, {"range": True})
+    functions = []
+    for node in program.body:
+        if node.type != "FunctionDeclaration":
+            continue
+        functions.append(
+            {
+                "name": node.id.name,
+                "type": ("AsyncFunctionDeclaration" if node.isAsync else node.type),
+                "body": code[node.range[0] : node.range[1]],
+                "params": [
+                    param.name if param.type == "Identifier" else None
+                    for param in node.params
+                ],
+            }
+        )
+    return functions
+
+
+def js_undefined_calls(code: str) -> set[str]:
+    """
+    Returns: the functions ``code`` calls without declaring them, other than
+      javascript globals. Constructors (capitalized) are not reported.
+    """
+    called = set(_CALL.findall(code)) - _JS_KEYWORDS - _JS_GLOBAL_FUNCTIONS
+    declared = set(js_function_names(code)) | set(_DECLARATION.findall(code))
+    return {name for name in called - declared if not name[0].isupper()}
+
+
+def _get_babel_extractor() -> tuple:
+    global _babel_extractor
+    if _babel_extractor is None:
+        # importing javascript starts the node bridge
+        from javascript import require
+
+        helper = require(
+            os.path.join(os.path.dirname(__file__), "extract_functions.js")
+        )
+        _babel_extractor = (
+            helper,
+            require("@babel/core"),
+            require("@babel/generator").default,
+        )
+    return _babel_extractor
+
+
+def babel_function_declarations(code: str) -> list[dict]:
+    """
+    Same as ``js_function_declarations`` with Babel, in a single bridge call.
+      Bodies are generated from the AST instead of sliced from ``code``.
+    """
+    helper, babel, generator = _get_babel_extractor()
+    return json.loads(helper.extractFunctions(babel, generator, code))
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from langchain.schema import AIMessage, BaseMessage
+
+from .file_utils import f_mkdir, get_parent_dir
+from .trace import get_trace
+
+
+class LLMCache:
+    """
+    Persistent cache of chat completions in SQLite. Entries expire after
+    ``ttl`` seconds and the least recently used ones are evicted once the
+    cached responses take more than ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/llm.sqlite",
+        ttl: Optional[float] = 30 * 24 * 60 * 60,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if path != ":memory:":
+            f_mkdir(get_parent_dir(path))
+        # agents may run in the threads of a VoyagerEnvPool
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """)
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses(accessed_at)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def get_key(
+        model: str, temperature: float, messages: list[BaseMessage], variant: int = 0
+    ) -> str:
+        request = {
+            "model": model,
+            "temperature": temperature,
+            "messages": [[message.type, message.content] for message in messages],
+        }
+        if variant:
+            request["variant"] = variant
+        canonical = json.dumps(
+            request,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses")
+        total = total.fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_llm_cache: Optional[LLMCache] = None
+
+
+def set_llm_cache(cache: Optional[LLMCache]) -> None:
+    global _llm_cache
+    _llm_cache = cache
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    return _llm_cache
+
+
+class CachedChatModel:
+    """
+    Wraps a LangChain chat model so ``invoke`` answers identical requests from
+    the cache set with ``set_llm_cache``, if any. Other attributes are
+    forwarded to the wrapped model.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.model = (
+            getattr(llm, "deployment_name", None)
+            or getattr(llm, "model_name", None)
+            or getattr(llm, "model", None)
+        )
+
+    def __getattr__(self, name):
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def invoke(
+        self, input, config=None, *, cache: bool = True, variant: int = 0, **kwargs
+    ) -> AIMessage:
+        """
+        With ``cache=False`` the model is always called, and its response
+        replaces the cached one (e.g. when the cached one could not be parsed).
+        Samples of the same request at a non-zero temperature are cached
+        separately by ``variant``.
+        """
+        key = LLMCache.get_key(self.model, self.llm.temperature, input, variant)
+        trace = get_trace()
+        if trace is not None and trace.replaying:
+            return AIMessage(content=trace.replay("llm", key))
+        message = self._invoke(key, input, config, cache, **kwargs)
+        if trace is not None:
+            trace.record("llm", key, message.content)
+        return message
+
+    def _invoke(self, key: str, input, config, cache: bool, **kwargs) -> AIMessage:
+        llm_cache = get_llm_cache()
+        if llm_cache is None:
+            return self.llm.invoke(input, config, **kwargs)
+        if cache:
+            content = llm_cache.get(key)
+            if content is not None:
+                return AIMessage(content=content)
+        message = self.llm.invoke(input, config, **kwargs)
+        llm_cache.put(key, message.content)
+        return message
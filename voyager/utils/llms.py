@@ -1,13 +1,11 @@
-from typing import Union
-
 from langchain_community.chat_models import ChatOllama
 from langchain_openai.chat_models import ChatOpenAI
 from langchain_openai.chat_models.azure import AzureChatOpenAI
 
+from .llm_cache import CachedChatModel
+
 
-def get_llm(
-    type: str, temperature: int, timeout: int
-) -> Union[AzureChatOpenAI, ChatOpenAI, ChatOllama]:
+def get_llm(type: str, temperature: int, timeout: int) -> CachedChatModel:
     assert type in ["gpt-3.5-turbo", "gpt-4", "mistral"], "Invalid LLM type"
     if type == "gpt-3.5-turbo":
         llm = ChatOpenAI(
@@ -24,4 +22,4 @@ def get_llm(
         )
     else:
         llm = ChatOllama(model="mistral", temperature=temperature, timeout=timeout)
-    return llm
+    return CachedChatModel(llm)
@@ -0,0 +1,109 @@
+import json
+import os
+from collections.abc import MutableMapping
+
+from .file_utils import f_exists, f_mkdir_in_path
+
+_DELETED = object()
+
+
+class JsonStore(MutableMapping):
+    """
+    Dict persisted in the JSON file ``path``, with write-behind: changes are
+    kept in memory until ``sync`` appends them to ``<path>.journal``, so the
+    writes of an iteration are proportional to what changed, and ``flush``
+    rewrites ``path`` atomically at checkpoints. Loading replays the journal
+    over ``path``, so synced changes survive a crash.
+
+    Setting a key to a value equal to the stored one is not a change.
+    """
+
+    def __init__(self, path: str, load: bool = True):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self._data = {}
+        self._pending = {}
+        f_mkdir_in_path(path)
+        if load and f_exists(path):
+            with open(path) as f:
+                self._data = json.load(f)
+        if load and f_exists(self.journal_path):
+            self._replay()
+        elif not load or not f_exists(path):
+            self._write()
+
+    def _replay(self) -> None:
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line is cut if the process died while syncing
+                    break
+                if len(change) == 2:
+                    self._data[change[0]] = change[1]
+                else:
+                    self._data.pop(change[0], None)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value) -> None:
+        if key in self._data and self._data[key] == value:
+            return
+        self._data[key] = value
+        self._pending[key] = value
+
+    def __delitem__(self, key) -> None:
+        del self._data[key]
+        self._pending[key] = _DELETED
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"JsonStore({self.path!r}, {self._data!r})"
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def sync(self) -> None:
+        """
+        Appends the pending changes to the journal.
+        """
+        if not self._pending:
+            return
+        lines = [
+            json.dumps([key] if value is _DELETED else [key, value]) + "\n"
+            for key, value in self._pending.items()
+        ]
+        with open(self.journal_path, "a") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending.clear()
+
+    def flush(self) -> None:
+        """
+        Rewrites the file with the whole dict, then drops the journal.
+        """
+        if self._pending or f_exists(self.journal_path) or not f_exists(self.path):
+            self._write()
+
+    def _write(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if f_exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._pending.clear()
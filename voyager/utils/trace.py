@@ -0,0 +1,171 @@
+import gzip
+import json
+import threading
+from collections import defaultdict, deque
+from typing import Optional
+
+from voyager.classes import content_hash
+
+from .file_utils import f_mkdir, get_parent_dir
+
+
+class Trace:
+    """
+    Gzipped JSON lines with every LLM response and every env reset and step
+    of a run. A recorded trace can be replayed without API keys nor a
+    Minecraft server: get_llm models answer from it and ReplayEnv stands in
+    for VoyagerEnv.
+
+    Responses are looked up by the hash of the request rather than by
+    position, so a replay tolerates calls skipped thanks to files left by
+    the recording (e.g. an existing sub_tasks.json).
+    """
+
+    def __init__(self, path: str, mode: str = "record"):
+        assert mode in ["record", "replay"], "Invalid trace mode"
+        self.path = path
+        self.mode = mode
+        self.meta = {}
+        self._responses = defaultdict(deque)
+        self._file = None
+        # agents may call their models from worker threads
+        self._lock = threading.Lock()
+        if mode == "record":
+            f_mkdir(get_parent_dir(path))
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["kind"] == "meta":
+                        self.meta.update(record["data"])
+                    else:
+                        self._responses[record["kind"], record["key"]].append(
+                            record["response"]
+                        )
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _write(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def _pop(self, kind: str, key: str):
+        with self._lock:
+            responses = self._responses.get((kind, key))
+            if not responses:
+                raise RuntimeError(
+                    f"No {kind} response recorded for {key} in {self.path}"
+                )
+            # the last response of a key is reused if the replay asks for it again
+            return responses.popleft() if len(responses) > 1 else responses[0]
+
+    def set_meta(self, **data) -> None:
+        self.meta.update(data)
+        if self._file is not None:
+            self._write({"kind": "meta", "data": data})
+
+    def record(self, kind: str, key: str, response) -> None:
+        if self._file is not None:
+            self._write({"kind": kind, "key": key, "response": response})
+
+    def replay(self, kind: str, key: str):
+        return self._pop(kind, key)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_trace: Optional[Trace] = None
+
+
+def set_trace(trace: Optional[Trace]) -> None:
+    global _trace
+    _trace = trace
+
+
+def get_trace() -> Optional[Trace]:
+    return _trace
+
+
+def get_step_key(code: str, programs_id: str = None) -> str:
+    return content_hash(json.dumps([code, programs_id]))
+
+
+def get_reset_key(kwargs: dict) -> str:
+    return content_hash(json.dumps(kwargs, sort_keys=True))
+
+
+class RecordingEnv:
+    """
+    Forwards to ``env`` and records its resets and steps in ``trace``.
+    """
+
+    def __init__(self, env, trace: Trace):
+        self.env = env
+        self.trace = trace
+
+    def __getattr__(self, name):
+        if name == "env":
+            raise AttributeError(name)
+        return getattr(self.env, name)
+
+    def reset(self, **kwargs) -> list:
+        events = self.env.reset(**kwargs)
+        self.trace.record("reset", get_reset_key(kwargs), events)
+        return events
+
+    def step(
+        self,
+        code: str,
+        programs: str = "",
+        programs_id: str = None,
+        dependencies: list[str] = None,
+    ) -> list:
+        events = self.env.step(
+            code, programs=programs, programs_id=programs_id, dependencies=dependencies
+        )
+        self.trace.record("step", get_step_key(code, programs_id), events)
+        return events
+
+
+class ReplayEnv:
+    """
+    Answers resets and steps with the events recorded in ``trace``.
+    """
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self.reset_time = 0.0
+        self.reset_times = []
+        self.registered_programs = set()
+
+    def reset(self, **kwargs) -> list:
+        self.reset_times.append(self.reset_time)
+        return self.trace.replay("reset", get_reset_key(kwargs))
+
+    def register_programs(self, programs: str, programs_id: str = None) -> str:
+        programs_id = programs_id or content_hash(programs)
+        self.registered_programs.add(programs_id)
+        return programs_id
+
+    def register_bundle(self, units: str, programs_id: str = None) -> str:
+        return self.register_programs(units, programs_id)
+
+    def step(
+        self,
+        code: str,
+        programs: str = "",
+        programs_id: str = None,
+        dependencies: list[str] = None,
+    ) -> list:
+        return self.trace.replay("step", get_step_key(code, programs_id))
+
+    def close(self) -> None:
+        pass
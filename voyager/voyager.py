@@ -1,4 +1,6 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import Optional
 
 import wandb
 
@@ -13,28 +15,43 @@ class Voyager:
     env: VoyagerEnv
     skill_manager: SkillManager
     pairs_manager: PairsManager
+    # programs requested at once per learning round, run best first
+    candidates: int = 1
+    # prepare the next subtask while the current program runs
+    speculate: bool = False
 
-    def reset(self, starting_position: tuple[int, int, int]) -> None:
+    def __post_init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1) if self.speculate else None
+        # (subtask content, whether a program is generated, future of it)
+        self._speculation: Optional[tuple[str, bool, Future]] = None
+        self.speculation_stats = {
+            "speculated": 0,
+            "used": 0,
+            "discarded": 0,
+            "succeeded": 0,
+        }
+
+    def reset(
+        self, starting_position: tuple[int, int, int], mode: str = "hard"
+    ) -> None:
+        x, y, z = starting_position
         self.env.reset(
-            mode="hard",
-        )
-        self._chat(
-            f"/tp {starting_position[0]} {starting_position[1]} {starting_position[2]}"
+            mode=mode,
+            position={"x": x, "y": y, "z": z},
+            time_of_day="day",
         )
-        self._chat(f"/time set day")
+        wandb.log({"reset_time": self.env.reset_time})
 
-    def execute(
-        self,
-        sub_task: SubTask,
-        index: int,
-    ) -> None:
+    def execute(self, sub_task: SubTask, index: int, verify: bool = False) -> bool:
+        """
+        Returns: whether the skill completed the subtask, which the critic
+          checks only with ``verify``
+        """
         print(f"\033[35m [{index}] [{sub_task.content}]\033[0m")
         performed = False
         for _ in range(3):
             try:
-                retries = self._execute_task(
-                    sub_task=sub_task,
-                )
+                success = self._execute_task(sub_task=sub_task, verify=verify)
                 performed = True
                 break
             except Exception as e:
@@ -42,15 +59,23 @@ class Voyager:
                 print(f"\033[41m{e}\033[0m")
         if not performed:
             raise ValueError("Rollout failed")
-        wandb.log({"retries": retries})
+        if verify:
+            wandb.log({"reused_skill_success": success})
+        self.flush()
+        return success
 
-    def learn_task(self, sub_task: SubTask, index: int) -> None:
+    def learn_task(
+        self, sub_task: SubTask, index: int, next_sub_task: SubTask = None
+    ) -> None:
         print(f"\033[35m[{index}] [{sub_task.content}]\033[0m")
         performed = False
-        for _ in range(3):
+        for attempt in range(3):
             try:
                 retries = self._learn_skill(
                     sub_task=sub_task,
+                    next_sub_task=next_sub_task,
+                    # the cached programs of the first attempt led to the error
+                    cache=attempt == 0,
                 )
                 performed = True
                 break
@@ -60,56 +85,233 @@ class Voyager:
         if not performed:
             raise ValueError("Rollout failed")
         wandb.log({"retries": retries})
+        if self.speculate:
+            stats = self.speculation_stats
+            hit_rate = stats["used"] / stats["speculated"] if stats["speculated"] else 0
+            wandb.log({**stats, "speculation_hit_rate": hit_rate})
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Checkpoint: rewrites the chest memory, skills and pairs files.
+        """
+        self.skill_manager.flush()
+        self.pairs_manager.flush()
+
+    def close(self) -> None:
+        """
+        Stops the speculation thread, then closes the environment.
+        """
+        if self._speculation is not None:
+            self._discard_speculation()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        self.env.close()
+
+    def run_task(
+        self, sub_task: SubTask, index: int, next_sub_task: SubTask = None
+    ) -> None:
+        """
+        Executes the skill learned for a similar subtask, if any, instead of
+        learning a new one. A skill learned for another subtask is checked by
+        the critic, and the subtask is learned when it fails.
+        """
+        skill_name, confidence = self.pairs_manager.find_skill_name(sub_task)
+        if skill_name is not None:
+            if self._speculation is not None:
+                self._discard_speculation()
+            if self.execute(sub_task=sub_task, index=index, verify=confidence < 1):
+                return
+            print(
+                f"\033[33m{skill_name} did not complete {sub_task.content}, learning it\033[0m"
+            )
+        self.learn_task(sub_task=sub_task, index=index, next_sub_task=next_sub_task)
+
+    def run_tasks(self, sub_tasks: list[SubTask], start_index: int = 0) -> None:
+        for i, sub_task in enumerate(sub_tasks):
+            next_sub_task = sub_tasks[i + 1] if i + 1 < len(sub_tasks) else None
+            self.run_task(
+                sub_task=sub_task, index=start_index + i, next_sub_task=next_sub_task
+            )
+
+    def _start_speculation(
+        self, sub_task: SubTask, next_sub_task: SubTask, events: list
+    ) -> None:
+        """
+        Prepares the prompt of the next subtask in the background. When it
+        does not need the item of the current one and no learned skill
+        matches it, its first program is generated too, from the current
+        observation.
+        """
+        if not self.speculate or next_sub_task is None:
+            return
+        if self._speculation is not None:
+            if self._speculation[0] == next_sub_task.content:
+                return
+            self._discard_speculation()
+        human_message = None
+        if (
+            not next_sub_task.depends_on(sub_task)
+            and self.pairs_manager.find_skill_name(next_sub_task)[0] is None
+        ):
+            # built here, the chest memory is only updated by this thread
+            human_message = self.skill_manager.get_status_message(
+                events=events, subtask=next_sub_task
+            )
+            self.speculation_stats["speculated"] += 1
+        self._speculation = (
+            next_sub_task.content,
+            human_message is not None,
+            self._executor.submit(self._speculate, next_sub_task, human_message),
+        )
+
+    def _speculate(self, sub_task: SubTask, human_message) -> Optional[str]:
+        if human_message is None:
+            self.skill_manager.prepare_skills_message(sub_task)
+            return None
+        return self.skill_manager.create_skill_from_status(sub_task, human_message)
+
+    def _take_speculation(self, sub_task: SubTask) -> Optional[str]:
+        """
+        Returns: the program generated ahead for the subtask, if any. The
+          speculation of another subtask is kept, e.g. the one of the next
+          subtask when the current one is learned again after an error.
+        """
+        if self._speculation is None or self._speculation[0] != sub_task.content:
+            return None
+        _, _, future = self._speculation
+        self._speculation = None
+        try:
+            skill_text = future.result()
+        except Exception as e:
+            print(f"\033[31mSpeculation for {sub_task.content} failed: {e}\033[0m")
+            return None
+        if skill_text is not None:
+            self.speculation_stats["used"] += 1
+        return skill_text
 
-    def _execute_task(self, sub_task: SubTask) -> None:
+    def _discard_speculation(self) -> None:
+        _, generates, future = self._speculation
+        self._speculation = None
+        # a running LLM call cannot be interrupted, its answer is ignored
+        future.cancel()
+        if generates:
+            self.speculation_stats["discarded"] += 1
+
+    def _execute_task(self, sub_task: SubTask, verify: bool = False) -> bool:
         events = self._get_checkpoint()
-        skill_name = self.pairs_manager.get_skill_name(sub_task.content)
+        skill_name = self.pairs_manager.get_skill_name(sub_task)
         skill_code = self.skill_manager.descriptor.skills[skill_name]["executable_code"]
         self.skill_manager.update_chest_memory(events[-1][1]["nearbyChests"])
-        events = self.env.step(
-            code=skill_code,
-            programs=self.skill_manager.descriptor.programs,
+        events = self._step(code=skill_code)
+        if not verify:
+            return True
+        self.skill_manager.update_chest_memory(events[-1][1]["nearbyChests"])
+        success, _ = self.skill_manager.critic.check_task_success(
+            events=events,
+            task=sub_task.content,
+            chest_observation=self.skill_manager.render_chest_observation(),
+            max_retries=5,
         )
+        return success
 
-    def _learn_skill(self, sub_task: SubTask) -> int:
+    def _learn_skill(
+        self, sub_task: SubTask, next_sub_task: SubTask = None, cache: bool = True
+    ) -> int:
         events = self._get_checkpoint()
         success = False
         code = ""
         critique = ""
+        runs = 0
         self.skill_manager.update_chest_memory(events[-1][1]["nearbyChests"])
+        speculative_text = self._take_speculation(sub_task)
         for iter in range(self.skill_manager.MAX_RETRIES):
+            if speculative_text is not None:
+                print(
+                    f"\033[34m****Action Agent ai message (speculative)****\n{speculative_text}\033[0m"
+                )
+                candidates = [self.skill_manager.extract_code(speculative_text)]
+                self.skill_manager.link_retrieved_skills(sub_task)
+            else:
+                # a retry may send the same messages as the failed round
+                candidates = self._get_candidates(
+                    events=events,
+                    sub_task=sub_task,
+                    code=code,
+                    critique=critique,
+                    cache=cache and iter == 0,
+                )
+            for program_code, program_name, exec_code in candidates:
+                runs += 1
+                full_code = program_code + "\n" + exec_code
+                self._start_speculation(sub_task, next_sub_task, events)
+                events = self._step(code=full_code)
+                self.skill_manager.update_chest_memory(events[-1][1]["nearbyChests"])
+                success, critique = self.skill_manager.critic.check_task_success(
+                    events=events,
+                    task=sub_task.content,
+                    chest_observation=self.skill_manager.render_chest_observation(),
+                    max_retries=5,
+                )
+
+                if success and speculative_text is not None:
+                    self.speculation_stats["succeeded"] += 1
+                if success:
+                    self.skill_manager.add_new_skill(
+                        subtask=sub_task,
+                        program_name=program_name,
+                        program_code=program_code,
+                        full_code=full_code,
+                    )
+                    self.pairs_manager.add_new_pair(
+                        subtask=sub_task, skill=program_name
+                    )
+                    return runs
+            speculative_text = None
+
+        return runs
+
+    def _get_candidates(
+        self,
+        events: list,
+        sub_task: SubTask,
+        code: str,
+        critique: str,
+        cache: bool = True,
+    ) -> list[tuple[str, str, str]]:
+        if self.candidates == 1:
             skill_text = self.skill_manager.create_skill(
-                events=events, subtask=sub_task, code=code, critique=critique
-            )
-            print(f"\033[34m****Action Agent ai message****\n{skill_text}\033[0m")
-            program_code, program_name, exec_code = self.skill_manager.extract_code(
-                skill_text=skill_text
-            )
-            full_code = program_code + "\n" + exec_code
-            events = self.env.step(
-                code=full_code,
-                programs=self.skill_manager.descriptor.programs,
-            )
-            self.skill_manager.update_chest_memory(events[-1][1]["nearbyChests"])
-            success, critique = self.skill_manager.critic.check_task_success(
                 events=events,
-                task=sub_task.content,
-                chest_observation=self.skill_manager.render_chest_observation(),
-                max_retries=5,
+                subtask=sub_task,
+                code=code,
+                critique=critique,
+                cache=cache,
             )
+            print(f"\033[34m****Action Agent ai message****\n{skill_text}\033[0m")
+            self.skill_manager.link_retrieved_skills(sub_task)
+            return [self.skill_manager.extract_code(skill_text=skill_text)]
+        skill_texts = self.skill_manager.create_skills(
+            events=events,
+            subtask=sub_task,
+            code=code,
+            critique=critique,
+            k=self.candidates,
+            cache=cache,
+        )
+        for skill_text in skill_texts:
+            print(f"\033[34m****Action Agent ai message****\n{skill_text}\033[0m")
+        # the ranking counts the retrieved skills as defined
+        self.skill_manager.link_retrieved_skills(sub_task)
+        return self.skill_manager.rank_candidates(skill_texts)
 
-            if success:
-                self.skill_manager.descriptor.add_new_skill(
-                    program_name=program_name,
-                    program_code=program_code,
-                    full_code=full_code,
-                )
-                self.pairs_manager.add_new_pair(
-                    task=sub_task.content, skill=program_name
-                )
-                break
-
-        return iter + 1
+    def _step(self, code: str) -> list:
+        # the bundle is uploaded once per version, the step only names the
+        # skills and primitives the program needs
+        bundle = self.skill_manager.descriptor.bundle
+        programs_id = self.env.register_bundle(bundle.units, bundle.hash)
+        return self.env.step(
+            code=code, programs_id=programs_id, dependencies=bundle.dependencies(code)
+        )
 
     def _chat(self, call: str) -> dict:
         events = self.env.step(f"bot.chat(`{call}`);")